@@ -1,5 +1,27 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.core.checks import Tags, register
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        from .auth import forget_user
+        from .sessions import check_shared_cache
+        from .sqlite import configure_connection
+
+        register(check_shared_cache, Tags.caches, deploy=True)
+
+        connection_created.connect(
+            configure_connection, dispatch_uid="core.sqlite_profile"
+        )
+        User = get_user_model()
+        post_save.connect(
+            forget_user, sender=User, dispatch_uid="core.auth_user_save"
+        )
+        post_delete.connect(
+            forget_user, sender=User, dispatch_uid="core.auth_user_delete"
+        )
@@ -0,0 +1,89 @@
+"""Пользователь запроса из кэша вместо чтения auth_user.
+
+Повторяет django.contrib.auth.get_user, но экземпляр пользователя
+берёт из кэша. В кэше лежат поля пользователя без пароля и готовый хэш
+сессии; пароль у собранного экземпляра отложен и читается из базы,
+только если понадобится. Запись сбрасывается при любом сохранении и
+удалении пользователя, в том числе при смене пароля, поэтому проверка
+хэша сессии по-прежнему разлогинивает остальные устройства.
+"""
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+    load_backend,
+)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.crypto import constant_time_compare
+
+KEY = "auth-user:{}"
+# Поля, которые не кладутся в кэш.
+SECRET_FIELDS = {"password"}
+
+
+def _session_hash(user):
+    if hasattr(user, "get_session_auth_hash"):
+        return user.get_session_auth_hash()
+    return None
+
+
+def _load_user(backend_path, user_id):
+    """Возвращает (пользователь, хэш сессии) или (None, None)."""
+    key = KEY.format(user_id)
+    record = cache.get(key)
+    if record is None:
+        user = load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return None, None
+        fields = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname not in SECRET_FIELDS
+        }
+        session_hash = _session_hash(user)
+        cache.set(
+            key, (fields, session_hash), settings.AUTH_USER_CACHE_TIMEOUT
+        )
+        return user, session_hash
+    fields, session_hash = record
+    model = get_user_model()
+    user = model.from_db(
+        router.db_for_read(model), list(fields), list(fields.values())
+    )
+    return user, session_hash
+
+
+def get_user(request):
+    """Пользователь сессии или AnonymousUser."""
+    user = None
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        pass
+    else:
+        if backend_path in settings.AUTHENTICATION_BACKENDS:
+            user, user_hash = _load_user(backend_path, user_id)
+            if user_hash is not None:
+                session_hash = request.session.get(HASH_SESSION_KEY)
+                if not (
+                    session_hash
+                    and constant_time_compare(session_hash, user_hash)
+                ):
+                    request.session.flush()
+                    user = None
+    return user or AnonymousUser()
+
+
+def forget_user(sender, instance, **kwargs):
+    """Обработчик post_save/post_delete пользователя."""
+    key = KEY.format(instance.pk)
+    cache.delete(key)
+    # Повтор после коммита: запрос мог закэшировать старую версию.
+    transaction.on_commit(lambda: cache.delete(key))
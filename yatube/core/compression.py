@@ -0,0 +1,103 @@
+"""Сжатие ответов и статики: gzip всегда, brotli — если установлен."""
+import gzip
+import io
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость.
+    brotli = None
+
+# Расширения файлов, которые хранятся рядом со сжатой копией.
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+MAX_LEVELS = {"br": 11, "gzip": 9}
+
+_qvalue = re.compile(r"^\s*([^;\s]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def available_encodings():
+    """Кодировки в порядке предпочтения сервера."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data, encoding, level=None, filename=""):
+    """Сжимает байты целиком; level по умолчанию — максимальный."""
+    if encoding == "br":
+        return brotli.compress(
+            data, quality=MAX_LEVELS["br"] if level is None else level
+        )
+    buffer = io.BytesIO()
+    with _gzip_file(buffer, level, filename) as file:
+        file.write(data)
+    return buffer.getvalue()
+
+
+def compress_sequence(chunks, encoding, level=None, filename=""):
+    """Сжимает поток по кусочку, отдавая каждый сразу после сжатия."""
+    if encoding == "br":
+        compressor = brotli.Compressor(
+            quality=MAX_LEVELS["br"] if level is None else level
+        )
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    buffer = _Drain()
+    with _gzip_file(buffer, level, filename) as file:
+        for chunk in chunks:
+            file.write(chunk)
+            # Z_SYNC_FLUSH: клиент получает кусок, не дожидаясь конца.
+            file.flush()
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
+
+
+def _gzip_file(buffer, level, filename):
+    # mtime=0: одинаковый вход даёт одинаковые байты (и ETag).
+    return gzip.GzipFile(
+        filename=filename,
+        mode="wb",
+        compresslevel=MAX_LEVELS["gzip"] if level is None else level,
+        fileobj=buffer,
+        mtime=0,
+    )
+
+
+class _Drain(io.BytesIO):
+    """Буфер, из которого забирают накопленное по мере записи."""
+
+    def drain(self):
+        data = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return data
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые клиент не запретил (q=0)."""
+    accepted = set()
+    for part in header.split(","):
+        match = _qvalue.match(part)
+        if not match:
+            continue
+        encoding, quality = match.groups()
+        try:
+            if quality is not None and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(encoding.lower())
+    return accepted
+
+
+def choose_encoding(header, candidates):
+    """Первая из candidates, которую принимает клиент, или None."""
+    accepted = accepted_encodings(header or "")
+    for encoding in candidates:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
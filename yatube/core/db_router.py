@@ -0,0 +1,149 @@
+"""Разделение чтения и записи между основной базой и репликами.
+
+Читать с реплик разрешено только view, помеченным read_from_replica,
+и только безопасными методами. Все записи идут в default. Если роутер
+отправил в default хоть одну запись, ReplicaPinMiddleware на
+REPLICA_PIN_SECONDS закрепляет пользователя за основной базой, чтобы
+он сразу увидел свои изменения, каким бы методом ни пришёл запрос.
+"""
+import os
+import random
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import Signal
+
+_reading = ContextVar("replica_reading", default=False)
+_wrote = ContextVar("primary_written", default=False)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+REPLICA_PIN_COOKIE = "pin_primary"
+
+# Реплика догнала default: закэшированное по её старым данным устарело.
+replica_synced = Signal(providing_args=["alias"])
+
+_replicas = None
+
+
+def available_replicas():
+    """Реплики, файл которых уже создан командой sync_replicas.
+
+    Файлы проверяются один раз на процесс, а не на каждый запрос:
+    реплика, появившаяся позже, подключится после перезапуска.
+    """
+    if _replicas is None:
+        refresh_replicas()
+    return _replicas
+
+
+def refresh_replicas():
+    """Заново проверяет файлы реплик."""
+    global _replicas
+    _replicas = [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if os.path.exists(connections[alias].settings_dict["NAME"])
+    ]
+    return _replicas
+
+
+def is_pinned(request):
+    return REPLICA_PIN_COOKIE in request.COOKIES
+
+
+class ReplicaRouter:
+    """Чтение внутри read_from_replica — с реплики, остальное — default."""
+
+    def db_for_read(self, model, **hints):
+        if not _reading.get():
+            return DEFAULT_DB_ALIAS
+        replicas = available_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Запись посреди запроса: дальше читаем своё из основной базы.
+        _reading.set(False)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики — копии основной базы, схема приходит вместе с данными.
+        return db not in settings.DATABASE_REPLICAS
+
+
+def read_from_replica(view):
+    """Декоратор: запросы на чтение внутри view идут на реплику."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_pinned(request):
+            return view(request, *args, **kwargs)
+        token = _reading.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _reading.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def watch_writes():
+    """Отдаёт функцию: была ли внутри блока запись в основную базу."""
+    token = _wrote.set(False)
+    try:
+        yield _wrote.get
+    finally:
+        _wrote.reset(token)
+
+
+def sync_replica(alias, method="backup"):
+    """Обновляет файл реплики снимком основной базы."""
+    size = snapshot_database(connections[alias].settings_dict["NAME"], method)
+    # Следующий запрос к реплике откроет уже новый файл.
+    connections[alias].close()
+    refresh_replicas()
+    replica_synced.send(sender=sync_replica, alias=alias)
+    return size
+
+
+def snapshot_database(target, method="backup"):
+    """Пишет копию default в файл target и возвращает его размер.
+
+    backup — онлайн-копия через sqlite3 backup API, безопасна при
+    параллельной записи; copy — простое копирование файла, годится,
+    когда в базу никто не пишет. В target страницы всегда пишет backup
+    API под блокировкой SQLite: подменять файл под открытыми
+    соединениями реплики (CONN_MAX_AGE, WAL) нельзя, это портит базу.
+    Вызывать вне транзакции: backup ждёт, пока она завершится.
+    """
+    source = connections[DEFAULT_DB_ALIAS]
+    if method == "copy":
+        # В режиме WAL свежие страницы лежат в -wal: сбрасываем их в файл.
+        with source.cursor() as cursor:
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        temporary = f"{target}.sync"
+        shutil.copyfile(source.settings_dict["NAME"], temporary)
+        snapshot = sqlite3.connect(temporary)
+    else:
+        source.ensure_connection()
+        snapshot = source.connection
+    destination = sqlite3.connect(target)
+    try:
+        snapshot.backup(destination)
+    finally:
+        destination.close()
+        if method == "copy":
+            snapshot.close()
+            os.remove(temporary)
+    return os.path.getsize(target)
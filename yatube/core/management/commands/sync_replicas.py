@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db_router import sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную SQLite-базу в файлы реплик из "
+        "DATABASE_REPLICAS; заменяет репликацию при локальном запуске."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=("backup", "copy"),
+            default="backup",
+            help="backup — онлайн через sqlite3 backup API, copy — "
+            "копирование файла остановленной базы.",
+        )
+        parser.add_argument(
+            "--alias",
+            dest="aliases",
+            action="append",
+            help="Реплика для обновления; по умолчанию все.",
+        )
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or settings.DATABASE_REPLICAS
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(
+                f"Не реплики: {', '.join(sorted(unknown))}"
+            )
+        for alias in aliases:
+            started = time.perf_counter()
+            size = sync_replica(alias, options["method"])
+            self.stdout.write(
+                f"{alias}: {size} байт за "
+                f"{time.perf_counter() - started:.2f} с"
+            )
+        self.stdout.write(self.style.SUCCESS("Реплики обновлены"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Компилирует шаблоны, импортирует тяжёлые модули и заполняет "
+        "URL-резолвер; показывает время каждого шага."
+    )
+
+    def handle(self, *args, **options):
+        total = 0.0
+        for name, count, elapsed in warm_up():
+            total += elapsed
+            self.stdout.write(f"{name}: {count} за {elapsed * 1000:.1f} мс")
+        self.stdout.write(
+            self.style.SUCCESS(f"Прогрев завершён за {total * 1000:.1f} мс")
+        )
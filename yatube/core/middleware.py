@@ -0,0 +1,295 @@
+import json
+import logging
+import mimetypes
+import os
+import secrets
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import auth, timing
+from .compression import (
+    SUFFIXES,
+    available_encodings,
+    choose_encoding,
+    compress,
+    compress_sequence,
+)
+from .db_router import REPLICA_PIN_COOKIE, SAFE_METHODS, watch_writes
+
+logger = logging.getLogger("yatube.timing")
+
+SERVER_TIMING_METRICS = (
+    ("db", "SQL"),
+    ("tpl", "templates"),
+    ("thumb", "thumbnails"),
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """View сделал больше SQL-запросов, чем разрешено бюджетом."""
+
+
+class ServerTimingMiddleware:
+    """Замеряет SQL, шаблоны и миниатюры каждого запроса.
+
+    Итог уходит в заголовок Server-Timing и строку лога yatube.timing.
+    Если у view есть бюджет в VIEW_QUERY_BUDGETS, превышение пишется
+    в лог, а при QUERY_BUDGET_STRICT приводит к исключению.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        view_name = self.view_name(request)
+        response["Server-Timing"] = self.header(timings)
+        self.log(request, response, view_name, timings)
+        self.check_budget(view_name, timings)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else None
+
+    @staticmethod
+    def header(timings):
+        metrics = []
+        for kind, description in SERVER_TIMING_METRICS:
+            milliseconds = timings.durations.get(kind, 0.0) * 1000
+            if kind == "db":
+                description = f"{description} x{timings.queries}"
+            metrics.append(
+                f'{kind};dur={milliseconds:.1f};desc="{description}"'
+            )
+        metrics.append(f"total;dur={timings.total() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    @staticmethod
+    def log(request, response, view_name, timings):
+        record = {
+            "view": view_name,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(timings.total() * 1000, 2),
+            "db_queries": timings.queries,
+        }
+        for kind, _ in SERVER_TIMING_METRICS:
+            record[f"{kind}_ms"] = round(
+                timings.durations.get(kind, 0.0) * 1000, 2
+            )
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+    @staticmethod
+    def check_budget(view_name, timings):
+        budget = settings.VIEW_QUERY_BUDGETS.get(view_name)
+        if budget is None or timings.queries <= budget:
+            return
+        message = (
+            f"{view_name}: {timings.queries} SQL-запросов "
+            f"при бюджете {budget}"
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli по Accept-Encoding клиента.
+
+    Сжимаются только типы из COMPRESS_CONTENT_TYPES; обычные ответы —
+    начиная с COMPRESS_MIN_SIZE байт, потоковые — по кусочку. Страницы
+    с CSRF-токеном уязвимы для BREACH, для них COMPRESS_CSRF_PAGES:
+    "skip" — не сжимать, "mask" — gzip со случайной длиной заголовка,
+    "compress" — сжимать как обычно.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        candidates = available_encodings()
+        filename = ""
+        if request.META.get("CSRF_COOKIE_USED"):
+            mode = settings.COMPRESS_CSRF_PAGES
+            if mode == "skip":
+                return response
+            if mode == "mask":
+                # Случайная длина ответа мешает подбирать токен по размеру.
+                candidates = ("gzip",)
+                filename = get_random_string(
+                    secrets.randbelow(settings.COMPRESS_MASK_MAX_LENGTH) + 1
+                )
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING"), candidates
+        )
+        if encoding is None:
+            return response
+        level = settings.COMPRESS_LEVELS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding, level, filename
+            )
+            del response["Content-Length"]
+        else:
+            content = response.content
+            if len(content) < settings.COMPRESS_MIN_SIZE:
+                return response
+            compressed = compress(content, encoding, level, filename)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # Тело изменилось: сильный ETag стал бы ложью.
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def is_compressible(response):
+        if response.has_header("Content-Encoding"):
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0]
+        return content_type.strip() in settings.COMPRESS_CONTENT_TYPES
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware с пользователем из кэша (core/auth.py)."""
+
+    def process_request(self, request):
+        assert hasattr(request, "session"), (
+            "CachedAuthenticationMiddleware требует SessionMiddleware "
+            "выше себя в MIDDLEWARE."
+        )
+        request.user = SimpleLazyObject(lambda: auth.get_user(request))
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет автора записи за основной базой на короткое время.
+
+    Решает не метод запроса, а роутер: закрепляет, если за время
+    запроса он отправил в default хоть одну запись (GET подписки тоже
+    пишет).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with watch_writes() as wrote:
+            response = self.get_response(request)
+            pin = wrote()
+        if pin:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT со сжатой копией.
+
+    Файлы с хэшем из манифеста не меняются никогда, поэтому получают
+    Cache-Control immutable на год; прочие — STATIC_UNHASHED_MAX_AGE.
+    Если файла нет, запрос идёт дальше по цепочке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._hashed = None
+
+    def __call__(self, request):
+        path = request.path_info
+        if (
+            settings.STATIC_ROOT
+            and request.method in SAFE_METHODS
+            and path.startswith(settings.STATIC_URL)
+        ):
+            response = self.serve(request, path[len(settings.STATIC_URL):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def hashed_names(self):
+        if self._hashed is None:
+            hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+            self._hashed = set(hashed_files.values())
+        return self._hashed
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        variants = [
+            encoding
+            for encoding, suffix in SUFFIXES.items()
+            if os.path.isfile(path + suffix)
+        ]
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING"), variants
+        )
+        served = path + SUFFIXES[encoding] if encoding else path
+        stat = os.stat(served)
+        if not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            return HttpResponseNotModified()
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            open(served, "rb"),
+            content_type=content_type or "application/octet-stream",
+        )
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if variants:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        if name in self.hashed_names():
+            response["Cache-Control"] = (
+                f"public, max-age={settings.STATIC_HASHED_MAX_AGE}, immutable"
+            )
+        else:
+            response["Cache-Control"] = (
+                f"public, max-age={settings.STATIC_UNHASHED_MAX_AGE}"
+            )
+        return response
@@ -0,0 +1,137 @@
+"""Сессии в кэше с отложенной записью в базу (SESSION_ENGINE).
+
+Чтение идёт из кэша; в базу сессия попадает при создании, а дальше
+не чаще раза в SESSION_WRITE_BEHIND_SECONDS — остальные изменения живут
+только в кэше. Если кэш потеряет запись раньше, вернётся версия из
+базы с изменениями не старше этого интервала. Вход и смена пароля
+(ключи WRITE_THROUGH_KEYS) пишутся в базу сразу, а удаление (logout,
+смена ключа) сразу чистит и кэш, и базу.
+
+Кэш SESSION_CACHE_ALIAS должен быть общим для всех процессов
+(memcached, redis): иначе другой воркер увидит удалённую сессию.
+Проверка check_shared_cache (manage.py check --deploy) считает ошибкой
+кэш в памяти процесса при выключенном DEBUG.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.core.checks import Error
+
+KEY_PREFIX = "yatube.sessions:"
+# Вход, выход и смена пароля пишутся в базу сразу, без отложенной записи.
+WRITE_THROUGH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+# Бэкенды кэша, которые видит только свой процесс.
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+class SessionStore(DBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        # Когда сессия последний раз записана в базу (time.time())
+        # и с какими значениями WRITE_THROUGH_KEYS.
+        self._synced_at = None
+        self._synced_auth = None
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def load(self):
+        try:
+            record = self._cache.get(self.cache_key)
+        except Exception:
+            # memcached отвергает некорректные ключи: начинаем заново.
+            record = None
+        if record is not None:
+            data, self._synced_at, self._synced_auth = record
+            return data
+        session = self._get_session_from_db()
+        if session is None:
+            return {}
+        data = self.decode(session.session_data)
+        self._synced_at = time.time()
+        self._synced_auth = self._auth_values(data)
+        self._cache.set(
+            self.cache_key,
+            (data, self._synced_at, self._synced_auth),
+            self.get_expiry_age(expiry=session.expire_date),
+        )
+        return data
+
+    @staticmethod
+    def _auth_values(data):
+        return tuple(data.get(key) for key in WRITE_THROUGH_KEYS)
+
+    def exists(self, session_key):
+        if session_key and self.cache_key_prefix + session_key in self._cache:
+            return True
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        auth = self._auth_values(data)
+        now = time.time()
+        if (
+            must_create
+            or self._synced_at is None
+            or auth != self._synced_auth
+            or now - self._synced_at >= settings.SESSION_WRITE_BEHIND_SECONDS
+        ):
+            super().save(must_create)
+            self._synced_at = now
+            self._synced_auth = auth
+        self._cache.set(
+            self.cache_key,
+            (data, self._synced_at, self._synced_auth),
+            self.get_expiry_age(),
+        )
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.delete(self.cache_key_prefix + session_key)
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+        self._synced_at = None
+        self._synced_auth = None
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Без DEBUG сессиям и пользователю запроса нужен общий кэш."""
+    if settings.DEBUG or settings.SESSION_ENGINE != __name__:
+        return []
+    errors = []
+    for alias in sorted({settings.SESSION_CACHE_ALIAS, "default"}):
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in LOCAL_CACHES:
+            errors.append(
+                Error(
+                    f"Кэш {alias!r} ({backend}) виден только своему "
+                    "процессу: выход и смена пароля не дойдут до других "
+                    "воркеров.",
+                    hint="Укажите в CACHES общий кэш: memcached или redis.",
+                    id="core.E001",
+                )
+            )
+    return errors
@@ -0,0 +1,114 @@
+"""Профиль соединений SQLite из settings.SQLITE_PRAGMAS.
+
+PRAGMA применяются к каждому новому соединению через connection_created.
+Первое соединение каждой базы в процессе пишет в лог yatube.sqlite
+действующие значения, а проверка sqlite_profile (manage.py check
+--tag database) сообщает о расхождениях с настройками.
+"""
+import logging
+
+from django.conf import settings
+from django.core.checks import Info, Tags, Warning, register
+from django.db import connections
+
+from .db_router import available_replicas
+
+logger = logging.getLogger("yatube.sqlite")
+
+# Значения, которые SQLite возвращает числами.
+ENUMS = {
+    "synchronous": {"off": 0, "normal": 1, "full": 2, "extra": 3},
+    "temp_store": {"default": 0, "file": 1, "memory": 2},
+}
+
+# Не имеют смысла для базы в памяти (например, тестовой).
+FILE_ONLY = {"journal_mode", "mmap_size"}
+
+_reported = set()
+
+
+def expected_value(name, value):
+    """Значение PRAGMA в том виде, в каком его вернёт SQLite."""
+    if isinstance(value, str):
+        value = value.lower()
+        return ENUMS.get(name, {}).get(value, value)
+    return value
+
+
+def apply_pragmas(connection):
+    # Через сырое соединение: PRAGMA не попадают в счётчики запросов.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def effective_pragmas(connection):
+    """Действующие значения настроенных PRAGMA соединения."""
+    connection.ensure_connection()
+    values = {}
+    for name in settings.SQLITE_PRAGMAS:
+        row = connection.connection.execute(f"PRAGMA {name}").fetchone()
+        values[name] = row[0] if row else None
+    return values
+
+
+def mismatches(connection, values):
+    """{имя: (ожидалось, получено)} для PRAGMA, не принявших настройку."""
+    result = {}
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        if name in FILE_ONLY and connection.is_in_memory_db():
+            continue
+        expected = expected_value(name, value)
+        actual = values.get(name)
+        if isinstance(actual, str):
+            actual = actual.lower()
+        if actual != expected:
+            result[name] = (expected, actual)
+    return result
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if connection.vendor != "sqlite":
+        return
+    apply_pragmas(connection)
+    if connection.alias in _reported:
+        return
+    _reported.add(connection.alias)
+    values = effective_pragmas(connection)
+    logger.info("%s: %s", connection.alias, values)
+    for name, (expected, actual) in mismatches(connection, values).items():
+        logger.warning(
+            "%s: PRAGMA %s = %s вместо %s",
+            connection.alias,
+            name,
+            actual,
+            expected,
+        )
+
+
+@register(Tags.database)
+def check_sqlite_profile(app_configs, **kwargs):
+    messages = []
+    # Реплику без файла не открываем: SQLite создал бы пустую базу.
+    skipped = set(settings.DATABASE_REPLICAS) - set(available_replicas())
+    for connection in connections.all():
+        if connection.vendor != "sqlite" or connection.alias in skipped:
+            continue
+        values = effective_pragmas(connection)
+        messages.append(
+            Info(
+                f"{connection.alias}: {values}",
+                id="core.I001",
+            )
+        )
+        problems = mismatches(connection, values)
+        for name, (expected, actual) in problems.items():
+            messages.append(
+                Warning(
+                    f"{connection.alias}: PRAGMA {name} = {actual}, "
+                    f"в настройках {expected}",
+                    hint="Проверьте SQLITE_PRAGMAS и сборку SQLite.",
+                    id="core.W001",
+                )
+            )
+    return messages
@@ -0,0 +1,46 @@
+"""Хранилище статики с хэшами в именах и сжатыми копиями.
+
+collectstatic пишет img/logo.png как img/logo.<md5>.png, а рядом с
+хэшированными текстовыми файлами — .gz и, если установлен brotli, .br.
+Отдаёт всё это StaticFilesMiddleware.
+"""
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .compression import SUFFIXES, available_encodings, compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for variant in self.compress_file(name):
+                yield name, variant, True
+
+    @staticmethod
+    def should_compress(name):
+        return name.lower().endswith(settings.STATIC_COMPRESS_EXTENSIONS)
+
+    def compress_file(self, name):
+        """Пишет сжатые копии файла; возвращает их имена."""
+        if not self.should_compress(name):
+            return []
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return []
+        written = []
+        for encoding in available_encodings():
+            compressed = compress(data, encoding)
+            # Копия, которая не меньше оригинала, только мешает.
+            if len(compressed) >= len(data):
+                continue
+            variant = name + SUFFIXES[encoding]
+            if self.exists(variant):
+                self.delete(variant)
+            self._save(variant, ContentFile(compressed))
+            written.append(variant)
+        return written
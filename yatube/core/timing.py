@@ -0,0 +1,54 @@
+"""Сбор времени SQL, шаблонов и миниатюр в рамках одного запроса."""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Счётчики одного запроса: время по видам работ и число SQL."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.queries = 0
+
+    def add(self, kind, seconds):
+        self.durations[kind] = self.durations.get(kind, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - started)
+            self.queries += 1
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    """Начинает сбор для текущего запроса и возвращает (сборщик, токен)."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(kind):
+    """Добавляет время блока к текущему запросу, если сбор идёт."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(kind, time.perf_counter() - started)
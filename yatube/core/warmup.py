@@ -0,0 +1,92 @@
+"""Прогрев процесса до первого запроса.
+
+Компилирует шаблоны проекта (с кэширующим загрузчиком они остаются
+в памяти процесса), импортирует тяжёлые модули и заполняет
+URL-резолвер. Вызывается из yatube/wsgi.py и командой warmup.
+"""
+import importlib
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+logger = logging.getLogger("yatube.warmup")
+
+HEAVY_MODULES = (
+    "PIL.Image",
+    "PIL.ImageOps",
+    "sorl.thumbnail.engines.pil_engine",
+    "sorl.thumbnail.kvstores.cached_db_kvstore",
+    "posts.images",
+    "posts.thumbnails",
+)
+
+# Ленивые объекты sorl.thumbnail, создаваемые при первом обращении.
+THUMBNAIL_DEFAULTS = ("backend", "engine", "kvstore", "storage")
+
+
+def template_names(directory):
+    """Имена всех шаблонов каталога относительно него самого."""
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith((".html", ".txt")):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, "/")
+
+
+def compile_templates():
+    """Загружает шаблоны из DIRS всех движков. Возвращает их число."""
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for directory in backend.engine.dirs:
+            for name in template_names(directory):
+                try:
+                    backend.engine.get_template(name)
+                except TemplateSyntaxError as exc:
+                    logger.warning("%s: %s", name, exc)
+                    continue
+                count += 1
+    return count
+
+
+def import_modules():
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)
+    # Регистрирует все плагины форматов, иначе это сделает первый open().
+    Image.init()
+    for name in THUMBNAIL_DEFAULTS:
+        # Обращение к __class__ создаёт объект за LazyObject.
+        getattr(default, name).__class__
+    return len(HEAVY_MODULES)
+
+
+def prime_urls():
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+STEPS = (
+    ("templates", compile_templates),
+    ("imports", import_modules),
+    ("urls", prime_urls),
+)
+
+
+def warm_up():
+    """Выполняет шаги прогрева; возвращает [(шаг, количество, секунды)]."""
+    report = []
+    for name, step in STEPS:
+        started = time.perf_counter()
+        count = step()
+        elapsed = time.perf_counter() - started
+        logger.info("%s: %s за %.3f с", name, count, elapsed)
+        report.append((name, count, elapsed))
+    return report
@@ -0,0 +1,168 @@
+"""JSON API лент только для чтения.
+
+Те же ленты, что index, group_list, profile и follow_index, но без
+рендеринга шаблонов: keyset-пагинация по курсору и параметр fields.
+Выборка идёт через .values() только по запрошенным колонкам, поэтому
+полный text читается из базы, только если явно запрошен fields=text;
+по умолчанию отдаётся excerpt.
+"""
+from django.conf import settings
+from django.http import JsonResponse
+
+from core.db_router import read_from_replica
+
+from . import feed, follows, lookups
+from .common import CURSOR_PARAM, CursorPaginator, FeedEntryPaginator
+from .conditional import (
+    conditional_feed,
+    group_scopes,
+    index_scopes,
+    profile_scopes,
+)
+from .models import Post
+
+FIELDS_PARAM = "fields"
+LIMIT_PARAM = "limit"
+
+# Поле ответа -> колонка для .values().
+FIELDS = {
+    "id": "id",
+    "text": "text",
+    "excerpt": "excerpt",
+    "pub_date": "pub_date",
+    "author": "author__username",
+    "group": "group__slug",
+    "image": "image",
+}
+DEFAULT_FIELDS = ("id", "author", "group", "pub_date", "excerpt", "image")
+# Нужны пагинатору для курсоров, даже если их не просили.
+KEY_COLUMNS = ("id", "pub_date")
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая уходит клиенту JSON-ответом."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_fields(request):
+    """Запрошенные поля в порядке запроса; неизвестное поле — ошибка."""
+    raw = request.GET.get(FIELDS_PARAM)
+    if not raw:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(filter(None, raw.split(","))))
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown or not fields:
+        raise ApiError(
+            f"Неизвестные поля: {', '.join(unknown)}. "
+            f"Доступны: {', '.join(FIELDS)}"
+        )
+    return fields
+
+
+def parse_limit(request):
+    raw = request.GET.get(LIMIT_PARAM)
+    if raw is None:
+        return settings.POSTS_PER_PAGE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ApiError(f"{LIMIT_PARAM} должен быть числом")
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def serialize(row, fields):
+    item = {}
+    for field in fields:
+        value = row[FIELDS[field]]
+        if field == "pub_date":
+            value = value.isoformat()
+        elif field == "image":
+            value = settings.MEDIA_URL + value if value else None
+        item[field] = value
+    return item
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return f"{request.path}?{query.urlencode()}"
+
+
+def feed_response(request, post_list, entries=None):
+    """Страница ленты в JSON; колонки выбираются по fields.
+
+    Для ленты подписок entries — записи FeedEntry: страница берётся
+    по ним, а посты читаются затем по id.
+    """
+    try:
+        fields = parse_fields(request)
+        limit = parse_limit(request)
+    except ApiError as exc:
+        return error_response(exc)
+    columns = {FIELDS[field] for field in fields}.union(KEY_COLUMNS)
+    cursor = request.GET.get(CURSOR_PARAM)
+    if entries is None:
+        page = CursorPaginator(post_list.values(*columns), limit).get_page(
+            cursor
+        )
+    else:
+        page = feed.page_posts(
+            FeedEntryPaginator(entries, limit).get_page(cursor),
+            post_list.values(*columns),
+        )
+    return JsonResponse(
+        {
+            "results": [serialize(row, fields) for row in page],
+            "next": page_url(request, page.next_cursor),
+            "previous": page_url(request, page.previous_cursor),
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def error_response(exc):
+    return JsonResponse(
+        {"error": exc.message},
+        status=exc.status,
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+@read_from_replica
+@conditional_feed(index_scopes)
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@read_from_replica
+@conditional_feed(group_scopes)
+def group_posts(request, slug):
+    group = lookups.group_by_slug(slug)
+    if group is None:
+        return error_response(ApiError("Группа не найдена", status=404))
+    return feed_response(request, Post.objects.filter(group_id=group.pk))
+
+
+@read_from_replica
+@conditional_feed(profile_scopes)
+def profile(request, username):
+    author = lookups.user_by_username(username)
+    if author is None:
+        return error_response(ApiError("Автор не найден", status=404))
+    return feed_response(request, Post.objects.filter(author_id=author.pk))
+
+
+@read_from_replica
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error_response(ApiError("Нужна авторизация", status=401))
+    entries = feed.entries_for(request.user)
+    if not follows.followed_authors(request.user):
+        entries = entries.none()
+    return feed_response(request, Post.objects.all(), entries)
@@ -0,0 +1,46 @@
+"""Кэш карточек постов для лент.
+
+Карточка не зависит от зрителя, поэтому кэшируется одна на пост с ключом
+из id и метки Post.updated: её делят все ленты, а правка поста или имени
+автора меняет метку и ключ. Лента берёт карточки страницы одним
+get_many и рендерит только промахи.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from . import thumbnails
+
+FRAGMENT = "post_card"
+TEMPLATE = "posts/includes/post_card.html"
+
+
+def card_key(post):
+    """Ключ карточки, как его построил бы тег {% cache post_card %}."""
+    return make_template_fragment_key(FRAGMENT, [post.pk, post.updated])
+
+
+def render_cards(posts):
+    """Кладёт в post.card HTML карточки: из кэша или отрендеренный."""
+    posts = list(posts)
+    keys = {post.pk: card_key(post) for post in posts}
+    found = cache.get_many(keys.values())
+    misses = [post for post in posts if keys[post.pk] not in found]
+    if misses:
+        thumbnails.resolve(misses)
+        template = get_template(TEMPLATE)
+        rendered = {
+            keys[post.pk]: template.render({"post": post}) for post in misses
+        }
+        cache.set_many(rendered, settings.FEED_CACHE_TIMEOUT)
+        found.update(rendered)
+    for post in posts:
+        post.card = mark_safe(found[keys[post.pk]])
+
+
+def touch(queryset):
+    """Меняет метку постов, чтобы их карточки отрендерились заново."""
+    queryset.update(updated=timezone.now())
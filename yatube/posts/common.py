@@ -1,8 +1,180 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+
+from django.core.paginator import Page, Paginator
 from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_PARAM = "cursor"
+
+
+def encode_token(payload):
+    """Упаковывает словарь в непрозрачный токен для URL."""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Распаковывает токен encode_token; битый токен — None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw.decode())
+    except (binascii.Error, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def encode_cursor(obj, backwards=False, date_field="pub_date", id_field="id"):
+    """Кодирует ключ записи (дата, id) в непрозрачный токен.
+
+    obj — модель или словарь из .values() с колонками даты и id.
+    """
+    if isinstance(obj, dict):
+        moment, pk = obj[date_field], obj[id_field]
+    else:
+        moment, pk = getattr(obj, date_field), getattr(obj, id_field)
+    payload = {"d": moment.isoformat(), "i": pk}
+    if backwards:
+        payload["b"] = 1
+    return encode_token(payload)
+
+
+def decode_cursor(token):
+    """Возвращает (дата, id, backwards) или None для битого токена."""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    try:
+        moment = parse_datetime(payload["d"])
+        pk = int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if moment is None:
+        return None
+    return moment, pk, bool(payload.get("b"))
+
+
+class CursorPage(Page):
+    """Страница keyset-пагинации: знает только соседние курсоры."""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Page cursor {self.previous_cursor}:{self.next_cursor}>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id) без COUNT(*) и OFFSET.
+
+    Стоимость любой страницы одинакова: выборка идёт по индексу
+    от ключа последнего показанного поста. Это не Paginator: числа
+    записей и страниц нет, шаблоны узнают его по is_cursor.
+    """
+
+    is_cursor = True
+    date_field = "pub_date"
+    id_field = "id"
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def get_page(self, cursor):
+        """Возвращает страницу по токену; битый токен — первая страница."""
+        key = decode_cursor(cursor)
+        queryset = self.object_list
+        field, id_field = self.date_field, self.id_field
+        if key is None:
+            rows = list(
+                queryset.order_by(f"-{field}", f"-{id_field}")[
+                    : self.per_page + 1
+                ]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            return self._build_page(rows, has_next=has_more, has_prev=False)
+
+        moment, pk, backwards = key
+        if backwards:
+            newer = Q(**{f"{field}__gt": moment}) | Q(
+                **{field: moment, f"{id_field}__gt": pk}
+            )
+            rows = list(
+                queryset.filter(newer).order_by(field, id_field)[
+                    : self.per_page + 1
+                ]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page][::-1]
+            return self._build_page(rows, has_next=True, has_prev=has_more)
+
+        older = Q(**{f"{field}__lt": moment}) | Q(
+            **{field: moment, f"{id_field}__lt": pk}
+        )
+        rows = list(
+            queryset.filter(older).order_by(f"-{field}", f"-{id_field}")[
+                : self.per_page + 1
+            ]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        return self._build_page(rows, has_next=has_more, has_prev=True)
+
+    def _build_page(self, rows, has_next, has_prev):
+        fields = {"date_field": self.date_field, "id_field": self.id_field}
+        next_cursor = (
+            encode_cursor(rows[-1], **fields) if rows and has_next else None
+        )
+        previous_cursor = (
+            encode_cursor(rows[0], backwards=True, **fields)
+            if rows and has_prev
+            else None
+        )
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class CommentPaginator(CursorPaginator):
+    """Keyset-пагинация комментариев по (created, id), новые первыми."""
+
+    date_field = "created"
+
+
+class FeedEntryPaginator(CursorPaginator):
+    """Keyset-пагинация записей ленты подписок по (pub_date, post_id).
+
+    Ключ совпадает с ключом поста, поэтому курсоры ленты и постов
+    взаимозаменяемы.
+    """
+
+    id_field = "post_id"
 
 
-def paginator_func(request, post_list):
+def paginator_func(request, post_list, cursor_class=CursorPaginator):
+    if (
+        settings.POSTS_PAGINATION_MODE == "cursor"
+        or CURSOR_PARAM in request.GET
+    ):
+        paginator = cursor_class(post_list, settings.POSTS_PER_PAGE)
+        return paginator.get_page(request.GET.get(CURSOR_PARAM))
     paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
@@ -0,0 +1,82 @@
+"""Валидаторы условных GET-запросов (ETag/Last-Modified).
+
+Валидаторы строятся из поколений лент (см. generations.py): поколение
+меняется при любой записи поста или комментария, а его токен — это
+время смены. Поэтому ответ 304 отдаётся без пагинации и рендеринга.
+"""
+from hashlib import md5
+
+from django.views.decorators.http import condition
+
+from . import generations, lookups
+from .models import Post
+
+
+def _validators(request, scopes):
+    """Возвращает (etag, last_modified) для набора лент страницы."""
+    if scopes is None:
+        return None, None
+    tokens = generations.generation_tokens(*scopes)
+    # Страница зависит от зрителя (шапка, кнопка подписки, форма).
+    viewer = request.user.pk if request.user.is_authenticated else "anon"
+    parts = tokens + [str(viewer), request.GET.urlencode()]
+    etag = md5(":".join(parts).encode()).hexdigest()
+    return etag, max(map(generations.token_time, tokens))
+
+
+def _viewer_scopes(request):
+    if request.user.is_authenticated:
+        return (generations.follow_scope(request.user.pk),)
+    return ()
+
+
+def index_scopes(request):
+    return (generations.INDEX,)
+
+
+def group_scopes(request, slug):
+    group = lookups.group_by_slug(slug)
+    if group is None:
+        return None
+    return (generations.group_scope(group.pk),)
+
+
+def profile_scopes(request, username):
+    author = lookups.user_by_username(username)
+    if author is None:
+        return None
+    return (generations.author_scope(author.pk),) + _viewer_scopes(request)
+
+
+def post_scopes(request, post_id):
+    row = Post.objects.filter(pk=post_id).values_list("author_id", "group_id")
+    row = row.first()
+    if row is None:
+        return None
+    author_id, group_id = row
+    scopes = (
+        generations.post_scope(post_id),
+        generations.author_scope(author_id),
+    )
+    if group_id is not None:
+        scopes += (generations.group_scope(group_id),)
+    # На странице поста есть кнопка подписки на автора.
+    return scopes + _viewer_scopes(request)
+
+
+def conditional_feed(scopes_func):
+    """Декоратор: отвечает 304, если поколения страницы не менялись."""
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, "_feed_validators"):
+            request._feed_validators = _validators(
+                request, scopes_func(request, *args, **kwargs)
+            )
+        return request._feed_validators
+
+    return condition(
+        etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+        last_modified_func=lambda *args, **kwargs: validators(
+            *args, **kwargs
+        )[1],
+    )
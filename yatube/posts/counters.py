@@ -0,0 +1,98 @@
+"""Денормализованные счётчики постов и комментариев.
+
+Счётчики меняются атомарным UPDATE ... SET n = n + delta при записи,
+поэтому страницы читают готовое число вместо COUNT(*). Копии счётчиков
+лежат в кэше поиска группы и автора (lookups.py) и сбрасываются здесь же.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import lookups
+from .models import AuthorStats, Comment, Group, Post, User
+
+BATCH_SIZE = 500
+
+
+def _shift(queryset, field, delta):
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def change_author_posts(user_id, delta):
+    stats = AuthorStats.objects.filter(user_id=user_id)
+    if not _shift(stats, "posts_count", delta) and delta > 0:
+        # Пользователь создан в обход сигнала (raw, bulk_create): заводим
+        # строку сразу с реальным числом постов. При удалении не создаём:
+        # строка могла уйти каскадом вместе с автором.
+        AuthorStats.objects.get_or_create(
+            user_id=user_id,
+            defaults={
+                "posts_count": Post.objects.filter(author_id=user_id).count()
+            },
+        )
+    lookups.forget_user_ids([user_id])
+
+
+def change_group_posts(group_id, delta):
+    if group_id is not None:
+        _shift(Group.objects.filter(pk=group_id), "posts_count", delta)
+        lookups.forget_group_ids([group_id])
+
+
+def change_post_comments(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), "comments_count", delta)
+
+
+def _actual(model, fk):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef("pk")})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _repair(queryset, field, actual):
+    """Исправляет строки, где счётчик разошёлся с реальным числом."""
+    drifted = (
+        queryset.annotate(actual=actual)
+        .exclude(**{field: F("actual")})
+        .values_list("pk", flat=True)
+    )
+    pks = list(drifted)
+    for start in range(0, len(pks), BATCH_SIZE):
+        batch = pks[start:start + BATCH_SIZE]
+        queryset.filter(pk__in=batch).update(**{field: actual})
+    return pks
+
+
+def reconcile_counters():
+    """Сверяет счётчики с данными. Возвращает число исправлений по видам."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        "pk", flat=True
+    )
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk) for pk in missing.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    authors = _repair(
+        AuthorStats.objects.all(), "posts_count", _actual(Post, "author")
+    )
+    groups = _repair(
+        Group.objects.all(), "posts_count", _actual(Post, "group")
+    )
+    posts = _repair(
+        Post.objects.all(), "comments_count", _actual(Comment, "post")
+    )
+    lookups.forget_user_ids(authors)
+    lookups.forget_group_ids(groups)
+    return {
+        "authors": len(authors),
+        "groups": len(groups),
+        "posts": len(posts),
+    }
@@ -0,0 +1,89 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Каждый новый пост раскладывается по «почтовым ящикам» подписчиков автора,
+поэтому лента follow_index читается одним диапазоном по индексу
+(user, pub_date) без соединения Follow и Post.
+"""
+from django.conf import settings
+
+from .models import FeedEntry, Follow, Post
+
+BATCH_SIZE = 1000
+
+
+def _entry(user_id, post):
+    return FeedEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        pub_date=post.pub_date,
+    )
+
+
+def fan_out_post(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    follower_ids = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    FeedEntry.objects.bulk_create(
+        (_entry(user_id, post) for user_id in follower_ids.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_follow(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .only("pk", "author_id", "pub_date")
+        .order_by("-pub_date", "-id")
+    )
+    limit = settings.FEED_BACKFILL_LIMIT
+    if limit is not None:
+        posts = posts[:limit]
+    FeedEntry.objects.bulk_create(
+        (_entry(user_id, post) for post in posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def entries_for(user):
+    """Ключи ленты подписчика: (post_id, pub_date) из индекса ленты."""
+    return FeedEntry.objects.filter(user_id=user.pk).values(
+        "post_id", "pub_date"
+    )
+
+
+def page_posts(page, posts):
+    """Заменяет записи ленты на странице постами в том же порядке.
+
+    posts — выборка постов (модели или .values() с id); посты читаются
+    одним запросом по первичному ключу.
+    """
+    ids = [entry["post_id"] for entry in page.object_list]
+    found = {}
+    for post in posts.filter(pk__in=ids):
+        found[post["id"] if isinstance(post, dict) else post.pk] = post
+    page.object_list = [found[pk] for pk in ids if pk in found]
+    return page
+
+
+def prune_follow(user_id, author_id):
+    """Убирает из ленты подписчика все посты автора."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild_feeds(user_ids=None):
+    """Пересобирает ленты из Follow и Post. Возвращает число записей."""
+    follows = Follow.objects.order_by("user_id", "author_id")
+    entries = FeedEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+    pairs = follows.values_list("user_id", "author_id")
+    for user_id, author_id in pairs.iterator():
+        backfill_follow(user_id, author_id)
+    return entries.count()
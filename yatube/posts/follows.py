@@ -0,0 +1,60 @@
+"""Кэш графа подписок: множество id авторов, на которых подписан user.
+
+Множество загружается лениво при первом обращении и перезаписывается
+из базы после каждой подписки или отписки (сигналы Follow), поэтому
+проверки «подписан ли» не ходят в базу.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Follow
+
+KEY = "follow-graph:{}"
+
+
+def _load(user_id):
+    # Только из default: граф, собранный по отставшей реплике, пережил бы
+    # её синхронизацию.
+    authors = frozenset(
+        Follow.objects.using(DEFAULT_DB_ALIAS)
+        .filter(user_id=user_id)
+        .values_list("author_id", flat=True)
+    )
+    cache.set(KEY.format(user_id), authors, settings.FOLLOW_GRAPH_TIMEOUT)
+    return authors
+
+
+def followed_authors(user):
+    """id авторов, на которых подписан пользователь (или пустое)."""
+    if not user.is_authenticated:
+        return frozenset()
+    authors = cache.get(KEY.format(user.pk))
+    if authors is None:
+        authors = _load(user.pk)
+    return authors
+
+
+def is_following(user, author_id):
+    return author_id in followed_authors(user)
+
+
+def following_many(user, author_ids):
+    """{id автора: подписан ли} для всех авторов страницы сразу."""
+    followed = followed_authors(user)
+    return {author_id: author_id in followed for author_id in author_ids}
+
+
+def refresh(user_id):
+    """Сбрасывает множество сразу и перечитывает его после коммита.
+
+    Сброс нужен, чтобы до коммита (и при откате) никто не прочитал
+    устаревшую версию; перечитывание — чтобы следующий запрос не ждал.
+    """
+    forget([user_id])
+    transaction.on_commit(lambda: _load(user_id))
+
+
+def forget(user_ids):
+    """Сбрасывает множества: следующий запрос загрузит их заново."""
+    cache.delete_many([KEY.format(user_id) for user_id in user_ids])
@@ -0,0 +1,102 @@
+"""Поколения кэша лент.
+
+Из «поколений» лент строятся валидаторы условных GET (conditional.py).
+Запись поста меняет поколение затронутых лент, и старые ETag просто
+перестают совпадать, их не нужно искать и удалять.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+from .models import Follow, Post
+
+INDEX = "index"
+# Поколение снимков реплик входит в ключ каждой ленты: ETag, собранный
+# по отставшей реплике, устаревает после sync_replica.
+REPLICAS = "replicas"
+KEY = "feed-gen:{}"
+
+
+def group_scope(group_id):
+    return f"group:{group_id}"
+
+
+def author_scope(author_id):
+    return f"author:{author_id}"
+
+
+def follow_scope(user_id):
+    return f"follow:{user_id}"
+
+
+def post_scope(post_id):
+    return f"post:{post_id}"
+
+
+def _new_token():
+    return format(time.time_ns(), "x")
+
+
+def generation_tokens(*scopes):
+    """Возвращает токены поколений указанных лент и реплик."""
+    keys = [KEY.format(scope) for scope in scopes + (REPLICAS,)]
+    found = cache.get_many(keys)
+    tokens = []
+    for key in keys:
+        token = found.get(key)
+        if token is None:
+            # Потерянное поколение нельзя считать нулевым: иначе оживут
+            # ETag, выданные до последней записи.
+            cache.add(key, _new_token(), None)
+            token = cache.get(key)
+        tokens.append(str(token))
+    return tokens
+
+
+def token_time(token):
+    """Момент смены поколения; токен — время в наносекундах."""
+    return datetime.fromtimestamp(int(token, 16) / 10 ** 9, tz=timezone.utc)
+
+
+def bump(*scopes):
+    """Делает устаревшими все ETag указанных лент."""
+    token = _new_token()
+    cache.set_many({KEY.format(scope): token for scope in scopes}, None)
+
+
+def feed_scopes(author_ids, group_ids):
+    """Ленты, где видны посты этих авторов и групп."""
+    scopes = {INDEX}
+    scopes.update(author_scope(author_id) for author_id in author_ids)
+    scopes.update(
+        group_scope(group_id) for group_id in group_ids if group_id is not None
+    )
+    follower_ids = Follow.objects.filter(author_id__in=author_ids).values_list(
+        "user_id", flat=True
+    )
+    scopes.update(follow_scope(user_id) for user_id in set(follower_ids))
+    return scopes
+
+
+def bump_post(post, old_group_id=None):
+    """Меняет поколения всех лент, где показывается пост."""
+    scopes = feed_scopes([post.author_id], [post.group_id, old_group_id])
+    scopes.add(post_scope(post.pk))
+    bump(*scopes)
+
+
+def bump_author(author_id):
+    """Меняет поколения всех лент с постами автора (смена имени)."""
+    group_ids = Post.objects.filter(author_id=author_id).values_list(
+        "group_id", flat=True
+    )
+    bump(*feed_scopes([author_id], set(group_ids)))
+
+
+def bump_group(group_id):
+    """Меняет поколения всех лент с постами группы (смена названия)."""
+    author_ids = Post.objects.filter(group_id=group_id).values_list(
+        "author_id", flat=True
+    )
+    bump(*feed_scopes(set(author_ids), [group_id]))
@@ -0,0 +1,96 @@
+"""Обработка картинок постов при загрузке.
+
+Фотографии уменьшаются до POST_IMAGE_MAX_SIZE по большей стороне,
+поворачиваются по EXIF Orientation и пережимаются в POST_IMAGE_FORMAT
+без метаданных. PNG пересохраняется без потерь, GIF не трогается
+(может быть анимированным). Картинка читается из временного файла
+загрузки и пишется во временный файл на диске, а не в память.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image, ImageOps, features
+
+PASSTHROUGH = {"GIF"}
+LOSSLESS = {"PNG"}
+EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+
+def is_supported(image_format):
+    """Умеет ли эта сборка Pillow сохранять формат (WebP — опционально)."""
+    if image_format == "WEBP":
+        return features.check("webp")
+    return True
+
+
+def _target_format(source_format):
+    if source_format in LOSSLESS:
+        return source_format
+    if is_supported(settings.POST_IMAGE_FORMAT):
+        return settings.POST_IMAGE_FORMAT
+    return "JPEG"
+
+
+def _prepare(image, target_format, max_size):
+    # draft() просит декодер JPEG сразу уменьшить картинку в 2–8 раз:
+    # 12-мегапиксельное фото не раскрывается в память целиком.
+    image.draft("RGB", (max_size, max_size))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    if target_format == "JPEG" and image.mode != "RGB":
+        if image.mode in ("RGBA", "LA", "P"):
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+        return image.convert("RGB")
+    if target_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    return image
+
+
+def _save_options(target_format):
+    if target_format == "JPEG":
+        return {
+            "quality": settings.POST_IMAGE_JPEG_QUALITY,
+            "optimize": True,
+            "progressive": True,
+        }
+    if target_format == "WEBP":
+        return {"quality": settings.POST_IMAGE_WEBP_QUALITY, "method": 4}
+    return {"optimize": True}
+
+
+def ingest(upload):
+    """Возвращает обработанную копию загруженного файла.
+
+    Если картинку трогать не нужно, возвращает сам upload.
+    """
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if image.format in PASSTHROUGH:
+            upload.seek(0)
+            return upload
+        target_format = _target_format(image.format)
+        icc_profile = image.info.get("icc_profile")
+        image = _prepare(image, target_format, max_size)
+        stem = os.path.splitext(os.path.basename(upload.name))[0]
+        output = tempfile.NamedTemporaryFile(
+            suffix=EXTENSIONS[target_format],
+            dir=settings.FILE_UPLOAD_TEMP_DIR,
+        )
+        # EXIF и прочие метаданные в файл не попадают: PNG иначе взял бы
+        # EXIF из image.info; цветовой профиль оставляем, иначе
+        # исказятся цвета.
+        image.save(
+            output,
+            target_format,
+            exif=b"",
+            icc_profile=icc_profile,
+            **_save_options(target_format),
+        )
+    output.seek(0)
+    return File(output, name=stem + EXTENSIONS[target_format])
@@ -0,0 +1,135 @@
+"""Кэш поиска группы по slug и пользователя по username.
+
+В кэше лежит короткий кортеж значений нескольких полей; из него
+собирается экземпляр модели с отложенными остальными полями, так что
+save() такого экземпляра не затрёт незагруженные колонки. В ту же
+запись входят счётчики постов группы и автора, которые показывают
+group_list и profile. Отсутствие записи тоже кэшируется (на
+LOOKUP_MISSING_TIMEOUT), чтобы перебор несуществующих профилей не
+доходил до базы. Сигналы Group и User сбрасывают ключи старого и нового
+значения при сохранении и удалении, а counters — при смене счётчиков.
+"""
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404
+
+from .models import AuthorStats, Group, User
+
+GROUP_KEY = "group-by-slug:{}"
+USER_KEY = "user-by-username:{}"
+GROUP_FIELDS = ("id", "title", "slug", "description", "posts_count")
+USER_FIELDS = ("id", "username", "first_name", "last_name")
+# Счётчик автора из AuthorStats едет в записи пользователя.
+USER_RELATED = ("stats__posts_count",)
+# Маркер «такой записи нет».
+MISSING = ()
+
+
+def _key(template, value):
+    # Хэш: в URL может прийти что угодно, а ключ должен быть допустимым.
+    return template.format(md5(value.encode()).hexdigest())
+
+
+def _columns(model, fields):
+    # Порядок колонок — как в модели: этого ждёт from_db().
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.attname in fields
+    ]
+
+
+def _lookup(model, fields, template, related=(), **lookup):
+    """(экземпляр, значения related) или None."""
+    (value,) = lookup.values()
+    key = _key(template, value)
+    columns = _columns(model, fields)
+    row = cache.get(key)
+    if row is None:
+        # Только из default: запись, собранная по отставшей реплике,
+        # пережила бы её синхронизацию.
+        row = model._default_manager.using(DEFAULT_DB_ALIAS).filter(**lookup)
+        row = row.values_list(*columns, *related).first()
+        if row is None:
+            cache.set(key, MISSING, settings.LOOKUP_MISSING_TIMEOUT)
+            return None
+        cache.set(key, row, settings.LOOKUP_CACHE_TIMEOUT)
+    elif row == MISSING:
+        return None
+    instance = model.from_db(DEFAULT_DB_ALIAS, columns, row[: len(columns)])
+    return instance, row[len(columns):]
+
+
+def group_by_slug(slug):
+    """Группа со счётчиком постов или None."""
+    found = _lookup(Group, GROUP_FIELDS, GROUP_KEY, slug=slug)
+    return None if found is None else found[0]
+
+
+def user_by_username(username):
+    """Пользователь с именами и user.stats.posts_count или None."""
+    found = _lookup(
+        User, USER_FIELDS, USER_KEY, USER_RELATED, username=username
+    )
+    if found is None:
+        return None
+    user, (posts_count,) = found
+    stats = None
+    if posts_count is not None:
+        stats = AuthorStats.from_db(
+            user._state.db, ["user_id", "posts_count"], (user.pk, posts_count)
+        )
+    # Как select_related: user.stats читается без запроса.
+    AuthorStats._meta.get_field("user").remote_field.set_cached_value(
+        user, stats
+    )
+    return user
+
+
+def get_group_or_404(slug):
+    group = group_by_slug(slug)
+    if group is None:
+        raise Http404("Группа не найдена")
+    return group
+
+
+def get_user_or_404(username):
+    user = user_by_username(username)
+    if user is None:
+        raise Http404("Пользователь не найден")
+    return user
+
+
+def _forget(template, values):
+    keys = [_key(template, value) for value in values if value]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # Повтор после коммита: параллельный запрос мог успеть закэшировать
+    # старую версию, пока транзакция не завершилась.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_groups(slugs):
+    _forget(GROUP_KEY, slugs)
+
+
+def forget_users(usernames):
+    _forget(USER_KEY, usernames)
+
+
+def forget_group_ids(group_ids):
+    forget_groups(
+        Group.objects.filter(pk__in=group_ids).values_list("slug", flat=True)
+    )
+
+
+def forget_user_ids(user_ids):
+    forget_users(
+        User.objects.filter(pk__in=user_ids).values_list(
+            "username", flat=True
+        )
+    )
@@ -0,0 +1,386 @@
+import json
+import platform
+import random
+import re
+import time
+from contextlib import ExitStack
+from io import StringIO
+from statistics import mean
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.db_router import refresh_replicas
+from posts.models import Comment, Follow, Group, Post, make_excerpt
+
+User = get_user_model()
+BATCH_SIZE = 500
+# Запросы сессии и загрузки пользователя запроса (backend.get_user).
+# Поиск профиля по username сюда не входит: он есть в обоих режимах.
+AUTH_SQL = re.compile(
+    r'FROM "django_session"|FROM "auth_user" WHERE "auth_user"\."id" = '
+)
+# Штатные сессии в базе и AuthenticationMiddleware для сравнения.
+STOCK_AUTH = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+    "MIDDLEWARE": [
+        "django.contrib.auth.middleware.AuthenticationMiddleware"
+        if name == "core.middleware.CachedAuthenticationMiddleware"
+        else name
+        for name in settings.MIDDLEWARE
+    ],
+}
+ROUTES = (
+    "index",
+    "group_list",
+    "profile",
+    "post_detail",
+    "follow_index",
+    "add_comment",
+)
+
+
+class QueryTimer:
+    """Обёртка execute_wrapper: считает запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.auth = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            if AUTH_SQL.search(sql):
+                self.auth += 1
+
+
+def percentile(values, share):
+    """Процентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон маршрутов posts.urls на детерминированных "
+        "данных: задержки p50/p95/p99, число и время SQL-запросов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--groups", type=int, default=5)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--follows", type=int, default=500)
+        parser.add_argument("--comments", type=int, default=2000)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Сколько запросов делать к каждому маршруту.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--route",
+            dest="routes",
+            action="append",
+            choices=ROUTES,
+            help="Маршрут для прогона; по умолчанию все.",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Очищать кэш перед каждым запросом.",
+        )
+        parser.add_argument(
+            "--compare-sessions",
+            action="store_true",
+            help="Повторить прогон со штатными сессиями в базе и "
+            "AuthenticationMiddleware и показать сэкономленные запросы.",
+        )
+        parser.add_argument(
+            "--output", help="Файл для результатов в формате JSON."
+        )
+        parser.add_argument(
+            "--baseline", help="JSON прошлого прогона для сравнения."
+        )
+        parser.add_argument(
+            "--in-place",
+            action="store_true",
+            help="Заполнять текущую базу, а не временную тестовую.",
+        )
+
+    def handle(self, *args, **options):
+        if options["in_place"]:
+            results = self.run(options)
+        else:
+            setup_test_environment()
+            # Все базы, включая реплики: реплика с TEST MIRROR смотрит
+            # в тестовую default, а не в рабочий файл.
+            old_config = setup_databases(
+                verbosity=0, interactive=False, aliases=set(connections)
+            )
+            refresh_replicas()
+            try:
+                results = self.run(options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                refresh_replicas()
+                teardown_test_environment()
+        self.report(results, options["baseline"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        fixtures = self.seed(rng, options)
+        cache.clear()
+        routes = {}
+        for name in options["routes"] or ROUTES:
+            routes[name] = self.measure(name, rng, fixtures, options)
+        stock = {}
+        if options["compare_sessions"]:
+            with override_settings(**STOCK_AUTH):
+                cache.clear()
+                for name in routes:
+                    stock[name] = self.measure(name, rng, fixtures, options)
+        return {
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+                "scale": {
+                    key: options[key]
+                    for key in (
+                        "users",
+                        "groups",
+                        "posts",
+                        "follows",
+                        "comments",
+                        "requests",
+                    )
+                },
+                "seed": options["seed"],
+                "cold": options["cold"],
+            },
+            "routes": routes,
+            "stock_sessions": stock,
+        }
+
+    def seed(self, rng, options):
+        """Создаёт одинаковый для одного seed набор данных."""
+        prefix = f"bench{options['seed']}"
+        User.objects.bulk_create(
+            (
+                User(username=f"{prefix}_user{i}", first_name=f"Имя{i}")
+                for i in range(options["users"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        users = list(
+            User.objects.filter(
+                username__startswith=f"{prefix}_user"
+            ).order_by("pk")
+        )
+        Group.objects.bulk_create(
+            Group(
+                title=f"Группа {i}",
+                slug=f"{prefix}-group{i}",
+                description="Описание группы",
+            )
+            for i in range(options["groups"])
+        )
+        groups = list(
+            Group.objects.filter(slug__startswith=prefix).order_by("pk")
+        )
+
+        def new_post():
+            post = Post(
+                author=rng.choice(users),
+                group=rng.choice(groups + [None]),
+                text=" ".join(
+                    f"слово{rng.randrange(1000)}"
+                    for _ in range(rng.randint(5, 200))
+                ),
+            )
+            # bulk_create не вызывает save(), где заполняется excerpt.
+            post.excerpt = make_excerpt(post.text)
+            return post
+
+        Post.objects.bulk_create(
+            (new_post() for _ in range(options["posts"])),
+            batch_size=BATCH_SIZE,
+        )
+        posts = list(
+            Post.objects.filter(author__in=users)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        pairs = {
+            (follower.pk, author.pk)
+            for follower, author in (
+                rng.sample(users, 2) for _ in range(options["follows"])
+            )
+        }
+        Follow.objects.bulk_create(
+            (Follow(user_id=user, author_id=author) for user, author in pairs),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post_id=rng.choice(posts),
+                    author=rng.choice(users),
+                    text=f"Комментарий {i}",
+                )
+                for i in range(options["comments"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        # bulk_create обходит сигналы: достраиваем производные данные.
+        for command in (
+            "rebuild_feeds",
+            "reconcile_counters",
+            "rebuild_search_index",
+        ):
+            call_command(command, stdout=StringIO())
+        follower_ids = [user for user, _ in sorted(pairs)]
+        reader = next(
+            (user for user in users if user.pk in follower_ids), users[0]
+        )
+        return {
+            "users": users,
+            "groups": groups,
+            "posts": posts,
+            "reader": reader,
+        }
+
+    def request(self, name, rng, fixtures, guest, reader):
+        if name == "index":
+            return guest.get(reverse("posts:index"))
+        if name == "group_list":
+            group = rng.choice(fixtures["groups"])
+            return guest.get(
+                reverse("posts:group_list", kwargs={"slug": group.slug})
+            )
+        if name == "profile":
+            author = rng.choice(fixtures["users"])
+            return guest.get(
+                reverse("posts:profile", kwargs={"username": author.username})
+            )
+        if name == "post_detail":
+            post_id = rng.choice(fixtures["posts"])
+            return guest.get(
+                reverse("posts:post_detail", kwargs={"post_id": post_id})
+            )
+        if name == "follow_index":
+            return reader.get(reverse("posts:follow_index"))
+        post_id = rng.choice(fixtures["posts"])
+        return reader.post(
+            reverse("posts:add_comment", kwargs={"post_id": post_id}),
+            {"text": "Комментарий из бенчмарка"},
+        )
+
+    def measure(self, name, rng, fixtures, options):
+        reader = Client()
+        reader.force_login(fixtures["reader"])
+        # Анонимный запрос не читает ни сессию, ни пользователя: для
+        # сравнения сессий все маршруты идут от вошедшего читателя.
+        guest = reader if options["compare_sessions"] else Client()
+        self.request(name, rng, fixtures, guest, reader)
+        latencies, queries, sql_times, statuses = [], [], [], set()
+        auth_queries = []
+        for _ in range(options["requests"]):
+            if options["cold"]:
+                cache.clear()
+            timer = QueryTimer()
+            with ExitStack() as stack:
+                # Чтение с реплики идёт через своё соединение.
+                for database in connections.all():
+                    stack.enter_context(database.execute_wrapper(timer))
+                started = time.perf_counter()
+                response = self.request(name, rng, fixtures, guest, reader)
+                latencies.append((time.perf_counter() - started) * 1000)
+            statuses.add(response.status_code)
+            queries.append(timer.count)
+            auth_queries.append(timer.auth)
+            sql_times.append(timer.seconds * 1000)
+        return {
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(mean(latencies), 3),
+            "queries_mean": round(mean(queries), 2),
+            "queries_max": max(queries),
+            "auth_queries_mean": round(mean(auth_queries), 2),
+            "sql_ms_mean": round(mean(sql_times), 3),
+            "statuses": sorted(statuses),
+        }
+
+    def report(self, results, baseline_path):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path, encoding="utf-8") as source:
+                baseline = json.load(source)["routes"]
+        header = (
+            f"{'маршрут':<14}{'p50':>10}{'p95':>10}{'p99':>10}"
+            f"{'SQL':>8}{'сессия':>8}{'SQL мс':>10}"
+        )
+        self.stdout.write(header)
+        for name, row in results["routes"].items():
+            line = (
+                f"{name:<14}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['queries_mean']:>8.1f}"
+                f"{row['auth_queries_mean']:>8.1f}"
+                f"{row['sql_ms_mean']:>10.2f}"
+            )
+            old = baseline.get(name)
+            if old and old["p95_ms"]:
+                delta = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+                line += (
+                    f"   p95 {delta:+.1f}%, SQL "
+                    f"{row['queries_mean'] - old['queries_mean']:+.1f}"
+                )
+            self.stdout.write(line)
+        if results["stock_sessions"]:
+            self.report_sessions(results)
+
+    def report_sessions(self, results):
+        """Сколько запросов сессии и пользователя экономит кэш."""
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'маршрут':<14}{'сессия штатно':>15}{'сессия кэш':>12}"
+            f"{'сэкономлено':>14}"
+        )
+        for name, stock in results["stock_sessions"].items():
+            cached = results["routes"][name]
+            saved = stock["auth_queries_mean"] - cached["auth_queries_mean"]
+            self.stdout.write(
+                f"{name:<14}{stock['auth_queries_mean']:>15.1f}"
+                f"{cached['auth_queries_mean']:>12.1f}{saved:>14.1f}"
+            )
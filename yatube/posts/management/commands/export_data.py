@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает группы, посты, комментарии и подписки в JSONL "
+        "потоком, порциями по --chunk-size строк."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="Файл для выгрузки; по умолчанию stdout."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=transfer.CHUNK_SIZE,
+            help="Сколько строк читать из базы за один запрос.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(model, done):
+            self.stderr.write(f"{model}: {done}")
+
+        if not options["output"]:
+            transfer.export_jsonl(
+                self.stdout, options["chunk_size"], progress
+            )
+            return
+        with open(options["output"], "w", encoding="utf-8") as output:
+            totals = transfer.export_jsonl(
+                output, options["chunk_size"], progress
+            )
+        for model, total in totals.items():
+            self.stdout.write(f"{model}: выгружено {total}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Выгрузка записана в {options['output']}")
+        )
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает JSONL из export_data пачками bulk_create. Авторы "
+        "сопоставляются по username, группы — по slug."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", help="Файл JSONL; «-» — читать из stdin."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=transfer.BATCH_SIZE,
+            help="Сколько строк вставлять одним bulk_create.",
+        )
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(
+            options["batch_size"],
+            progress=lambda model, done: self.stdout.write(
+                f"{model}: {done}"
+            ),
+        )
+        with transaction.atomic():
+            if options["input"] == "-":
+                totals = importer.load(sys.stdin)
+            else:
+                with open(options["input"], encoding="utf-8") as source:
+                    totals = importer.load(source)
+        for model, total in totals.items():
+            self.stdout.write(f"{model}: загружено {total}")
+        if importer.skipped:
+            self.stdout.write(
+                self.style.WARNING(f"Пропущено строк: {importer.skipped}")
+            )
+        self.stdout.write(self.style.SUCCESS("Загрузка завершена"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Пересобирает материализованные ленты подписок из Follow и Post."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            dest="user_ids",
+            type=int,
+            action="append",
+            help="id пользователя; можно указать несколько раз.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_feeds(options["user_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Лент пересобрано, записей: {total}")
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Переиндексирует посты для полнотекстового поиска порциями."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=search.CHUNK_SIZE,
+            help="Сколько постов индексировать за один запрос.",
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError("Поиск FTS5 работает только на SQLite.")
+        with transaction.atomic():
+            total = search.rebuild(
+                options["chunk_size"],
+                progress=lambda done: self.stdout.write(
+                    f"Проиндексировано: {done}"
+                ),
+            )
+        self.stdout.write(self.style.SUCCESS(f"Готово, постов: {total}"))
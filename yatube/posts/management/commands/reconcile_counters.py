@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Сверяет денормализованные счётчики постов и комментариев."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            repaired = reconcile_counters()
+        for kind, total in repaired.items():
+            self.stdout.write(f"{kind}: исправлено {total}")
+        self.stdout.write(self.style.SUCCESS("Счётчики сверены"))
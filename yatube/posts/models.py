@@ -1,10 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.text import Truncator
 
 from core.models import CreatedModel
 
 User = get_user_model()
 TEXT_SYMBOLS = 15
+EXCERPT_LENGTH = 300
+
+
+def make_excerpt(text):
+    """Начало текста для лент; длинный текст обрезается с «…»."""
+    return Truncator(text).chars(EXCERPT_LENGTH)
 
 
 class Post(models.Model):
@@ -14,6 +21,11 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         verbose_name="Дата публикации", auto_now_add=True, db_index=True
     )
+    # Метка изменения для ключа кэша карточки (posts/cards.py). Её
+    # обновляют и изменения, видимые в карточке: автор, группа, миниатюры.
+    updated = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True
+    )
     author = models.ForeignKey(
         User,
         verbose_name="Автор",
@@ -30,14 +42,42 @@ class Post(models.Model):
         related_name="posts",
     )
     image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    comments_count = models.PositiveIntegerField(
+        verbose_name="Количество комментариев", default=0, editable=False
+    )
+    # Ленты читают только его, а text откладывают (.defer("text")).
+    excerpt = models.CharField(
+        verbose_name="Начало текста",
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False,
+    )
 
     def __str__(self):
         return self.text[:TEXT_SYMBOLS]
 
+    def save(self, *args, **kwargs):
+        if "text" not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.text)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "text" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "excerpt"}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_feed_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_feed_idx",
+            ),
+        ]
 
 
 class Group(models.Model):
@@ -46,11 +86,36 @@ class Group(models.Model):
         verbose_name="Уникальное название группы", unique=True
     )
     description = models.TextField(verbose_name="Описание группы")
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Количество постов", default=0, editable=False
+    )
 
     def __str__(self):
         return self.title
 
 
+class AuthorStats(models.Model):
+    """Счётчики автора, которые поддерживаются при записи."""
+
+    user = models.OneToOneField(
+        User,
+        verbose_name="Автор",
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="stats",
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Количество постов", default=0
+    )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.posts_count}"
+
+    class Meta:
+        verbose_name = "Статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+
 class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
@@ -75,6 +140,12 @@ class Comment(CreatedModel):
         ordering = ("-created",)
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=["post", "-created", "-id"],
+                name="comment_thread_idx",
+            ),
+        ]
 
 
 class Follow(CreatedModel):
@@ -103,3 +174,49 @@ class Follow(CreatedModel):
                 fields=["user", "author"], name="unique_follow"
             )
         ]
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name="Читатель",
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name="Пост",
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name="Автор",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    def __str__(self):
+        return f"{self.post_id} в ленте {self.user_id}"
+
+    class Meta:
+        ordering = ("-pub_date", "-post")
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="feed_user_range_idx",
+            ),
+            models.Index(
+                fields=["user", "author"], name="feed_user_author_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_feed_entry"
+            )
+        ]
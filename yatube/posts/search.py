@@ -0,0 +1,138 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс — виртуальная таблица posts_post_fts, где rowid совпадает с id
+поста, а колонки хранят текст поста и название его группы. Индекс
+обновляется сигналами при записи постов и групп.
+"""
+import re
+
+from django.db import connection, connections, router
+
+from .common import CursorPage, CursorPaginator, decode_token, encode_token
+from .models import Post
+
+TABLE = "posts_post_fts"
+CHUNK_SIZE = 1000
+# NUL обрывает строку MATCH в SQLite («unterminated string»).
+CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f]")
+
+
+def is_supported():
+    return connection.vendor == "sqlite"
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки (синтаксис FTS5 не интерпретируется)
+    и ищется по префиксу; слова объединяются через AND.
+    """
+    query = CONTROL_CHARS.sub(" ", query)
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"*' for term in terms if term)
+
+
+def index_rows(rows):
+    """Индексирует строки (id, text, group_title)."""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s",
+            [(row[0],) for row in rows],
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, text, group_title) "
+            "VALUES (%s, %s, %s)",
+            [(pk, text, title or "") for pk, text, title in rows],
+        )
+
+
+def index_posts(queryset):
+    index_rows(list(queryset.values_list("pk", "text", "group__title")))
+
+
+def retitle_group(group_id, title):
+    """Меняет название группы в индексе всех её постов одним UPDATE."""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {TABLE} SET group_title = %s WHERE rowid IN "
+            "(SELECT id FROM posts_post WHERE group_id = %s)",
+            [title or "", group_id],
+        )
+
+
+def unindex_post(post_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild(chunk_size=CHUNK_SIZE, progress=None):
+    """Переиндексирует все посты порциями по первичному ключу."""
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    last_pk = 0
+    total = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "text", "group__title")[:chunk_size]
+        )
+        if not rows:
+            return total
+        index_rows(rows)
+        last_pk = rows[-1][0]
+        total += len(rows)
+        if progress is not None:
+            progress(total)
+
+
+class SearchPaginator(CursorPaginator):
+    """Keyset-пагинация по (bm25, id) для выдачи поиска."""
+
+    def __init__(self, query, per_page):
+        super().__init__(Post.objects.none(), per_page)
+        self.query = query
+
+    def get_page(self, cursor):
+        expression = match_expression(self.query)
+        if not expression or not is_supported():
+            return CursorPage([], self, None, None)
+        key = decode_token(cursor) or {}
+        sql = (
+            f"SELECT id, score FROM (SELECT rowid AS id, bm25({TABLE}) "
+            f"AS score FROM {TABLE} WHERE {TABLE} MATCH %s)"
+        )
+        params = [expression]
+        try:
+            score, last_id = float(key["s"]), int(key["i"])
+        except (KeyError, TypeError, ValueError):
+            score = last_id = None
+        if score is not None:
+            sql += " WHERE score > %s OR (score = %s AND id > %s)"
+            params += [score, score, last_id]
+        sql += " ORDER BY score, id LIMIT %s"
+        params.append(self.per_page + 1)
+        database = connections[router.db_for_read(Post)]
+        with database.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            hits = db_cursor.fetchall()
+        has_next = len(hits) > self.per_page
+        hits = hits[: self.per_page]
+        posts = (
+            Post.objects.select_related("author", "group")
+            .defer("text")
+            .in_bulk([pk for pk, _ in hits])
+        )
+        rows = [posts[pk] for pk, _ in hits if pk in posts]
+        next_cursor = None
+        if has_next:
+            next_cursor = encode_token({"s": hits[-1][1], "i": hits[-1][0]})
+        return CursorPage(rows, self, next_cursor, None)
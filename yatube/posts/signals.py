@@ -0,0 +1,198 @@
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.db_router import replica_synced
+
+from . import cards, counters, feed, follows, generations, lookups, search
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+_DEFERRED = object()
+# Поля пользователя, которые видны в карточке поста.
+CARD_USER_FIELDS = {"username", "first_name", "last_name"}
+# Поля, которые пишет вход пользователя (update_last_login).
+LOGIN_FIELDS = {"last_login"}
+
+
+@receiver(post_save, sender=User)
+def user_stats_and_feed(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+        return
+    # Вход обновляет только last_login: ленты от него не меняются.
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and set(update_fields) <= LOGIN_FIELDS:
+        return
+    names = _card_names(instance)
+    if names == instance._saved_card_names:
+        generations.bump(generations.author_scope(instance.pk))
+        return
+    # Имя автора есть в карточках всех лент, где видны его посты.
+    cards.touch(Post.objects.filter(author_id=instance.pk))
+    generations.bump_author(instance.pk)
+    instance._saved_card_names = names
+
+
+def _card_names(user):
+    # Отложенное поле не загружено, значит, и не менялось.
+    return {
+        field: user.__dict__.get(field, _DEFERRED)
+        for field in CARD_USER_FIELDS
+    }
+
+
+@receiver(post_init, sender=User)
+def user_remember_username(sender, instance, **kwargs):
+    instance._saved_username = instance.__dict__.get("username")
+    instance._saved_card_names = _card_names(instance)
+
+
+@receiver(post_save, sender=User)
+def user_forget_lookup(sender, instance, raw=False, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not (
+        set(lookups.USER_FIELDS) & set(update_fields)
+    ):
+        return
+    lookups.forget_users({instance._saved_username, instance.username})
+    instance._saved_username = instance.username
+
+
+@receiver(post_delete, sender=User)
+def user_delete_lookup(sender, instance, **kwargs):
+    lookups.forget_users({instance._saved_username, instance.username})
+
+
+@receiver(post_init, sender=Group)
+def group_remember_slug(sender, instance, **kwargs):
+    instance._saved_slug = instance.__dict__.get("slug")
+    instance._saved_card = _group_card(instance)
+
+
+def _group_card(group):
+    # Название и ссылка группы видны в карточках её постов.
+    return (group.__dict__.get("title"), group.__dict__.get("slug"))
+
+
+@receiver(post_save, sender=Group)
+def group_forget_lookup(sender, instance, raw=False, **kwargs):
+    lookups.forget_groups({instance._saved_slug, instance.slug})
+    instance._saved_slug = instance.slug
+
+
+@receiver(post_delete, sender=Group)
+def group_delete_lookup(sender, instance, **kwargs):
+    lookups.forget_groups({instance._saved_slug, instance.slug})
+
+
+@receiver(post_init, sender=Post)
+def post_remember_group(sender, instance, **kwargs):
+    instance._saved_group_id = instance.__dict__.get("group_id", _DEFERRED)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_invalidate_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_group_id = instance._saved_group_id
+    generations.bump_post(
+        instance, None if old_group_id is _DEFERRED else old_group_id
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_count(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_author_posts(instance.author_id, 1)
+        counters.change_group_posts(instance.group_id, 1)
+    elif instance._saved_group_id not in (_DEFERRED, instance.group_id):
+        counters.change_group_posts(instance._saved_group_id, -1)
+        counters.change_group_posts(instance.group_id, 1)
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def post_index_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_posts(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def post_unindex_text(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_uncount(sender, instance, **kwargs):
+    counters.change_author_posts(instance.author_id, -1)
+    counters.change_group_posts(instance.group_id, -1)
+    generations.bump_post(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_refresh(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    card = _group_card(instance)
+    if created or card == instance._saved_card:
+        generations.bump(generations.group_scope(instance.pk))
+    else:
+        if card[0] != instance._saved_card[0]:
+            search.retitle_group(instance.pk, instance.title)
+        cards.touch(instance.posts.all())
+        generations.bump_group(instance.pk)
+    instance._saved_card = card
+
+
+@receiver(pre_delete, sender=Group)
+def group_untitle_posts(sender, instance, **kwargs):
+    search.retitle_group(instance.pk, "")
+    cards.touch(instance.posts.all())
+    generations.bump_group(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post_comments(instance.post_id, 1)
+        generations.bump(generations.post_scope(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_uncount(sender, instance, **kwargs):
+    counters.change_post_comments(instance.post_id, -1)
+    generations.bump(generations.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.backfill_follow(instance.user_id, instance.author_id)
+        follows.refresh(instance.user_id)
+        generations.bump(generations.follow_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_prune(sender, instance, **kwargs):
+    feed.prune_follow(instance.user_id, instance.author_id)
+    follows.refresh(instance.user_id)
+    generations.bump(generations.follow_scope(instance.user_id))
+
+
+@receiver(replica_synced)
+def replica_refresh_feeds(sender, alias, **kwargs):
+    generations.bump(generations.REPLICAS)
@@ -0,0 +1,12 @@
+from django import template
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(page_obj):
+    """Карточки страницы ленты одним get_many; рендерятся только промахи."""
+    cards.render_cards(page_obj)
+    return ""
@@ -0,0 +1,29 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+# Ширина картинки в вёрстке: колонка контейнера Bootstrap.
+PICTURE_SIZES = "(max-width: 992px) 100vw, 960px"
+
+
+@register.inclusion_tag("posts/includes/post_picture.html")
+def post_picture(post):
+    """<picture> с srcset по готовым миниатюрам поста."""
+    thumbnails.lookup(post)
+    sources = [
+        {
+            "type": f"image/{image_format.lower()}",
+            "srcset": ", ".join(
+                f"{thumbnail.url} {width}w" for width, thumbnail in sizes
+            ),
+        }
+        for image_format, sizes in post.renditions.items()
+    ]
+    return {
+        "post": post,
+        "thumbnail": post.thumbnail,
+        "sources": sources,
+        "sizes": PICTURE_SIZES,
+    }
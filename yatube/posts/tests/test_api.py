@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        for i in range(13):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if i % 2 else None,
+                text=f"Длинный текст поста {i}",
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def collect(self, url, params):
+        """Проходит ленту по ссылкам next и возвращает все записи."""
+        results = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            results.extend(data["results"])
+            if data["next"] is None:
+                return results
+            response = self.client.get(data["next"])
+
+    def test_feeds_match_html_order(self):
+        """JSON-ленты отдают те же посты, что и HTML-страницы."""
+        self.client.force_login(self.reader)
+        expected = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "pk", flat=True
+            )
+        )
+        feeds = {
+            reverse("posts:api_index"): expected,
+            reverse("posts:api_profile", kwargs={"username": "author"}):
+                expected,
+            reverse("posts:api_follow_index"): expected,
+            reverse("posts:api_group_list", kwargs={"slug": "group"}): list(
+                self.group.posts.order_by("-pub_date", "-id").values_list(
+                    "pk", flat=True
+                )
+            ),
+        }
+        for url, ids in feeds.items():
+            with self.subTest(url=url):
+                results = self.collect(url, {"fields": "id", "limit": 4})
+                self.assertEqual([item["id"] for item in results], ids)
+
+    def test_sparse_fields_skip_columns(self):
+        """Без fields=text колонка text не читается из базы."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("posts:api_index"), {"fields": "id,author"}
+            )
+        item = response.json()["results"][0]
+        self.assertEqual(set(item), {"id", "author"})
+        self.assertEqual(item["author"], "author")
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn('"posts_post"."text"', sql)
+
+    def test_default_fields(self):
+        """Без fields отдаются поля карточки: начало текста вместо text."""
+        response = self.client.get(reverse("posts:api_index"))
+        item = response.json()["results"][0]
+        self.assertEqual(item["excerpt"], "Длинный текст поста 12")
+        self.assertNotIn("text", item)
+        self.assertIsNone(item["image"])
+
+    def test_errors_are_json(self):
+        """Ошибки приходят JSON с нужным статусом."""
+        cases = (
+            (reverse("posts:api_index"), {"fields": "id,secret"}, 400),
+            (reverse("posts:api_index"), {"limit": "x"}, 400),
+            (reverse("posts:api_group_list", kwargs={"slug": "no"}), {}, 404),
+            (reverse("posts:api_follow_index"), {}, 401),
+        )
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn("error", response.json())
@@ -0,0 +1,63 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.bench import ROUTES
+
+
+class BenchCommandTest(TestCase):
+    def test_bench_writes_results_for_every_route(self):
+        """bench замеряет все маршруты и пишет JSON для сравнения."""
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "bench",
+                users=4,
+                groups=2,
+                posts=30,
+                follows=6,
+                comments=10,
+                requests=3,
+                in_place=True,
+                output=output.name,
+                stdout=StringIO(),
+            )
+            with open(output.name, encoding="utf-8") as source:
+                results = json.load(source)
+        self.assertEqual(set(results["routes"]), set(ROUTES))
+        for name, row in results["routes"].items():
+            with self.subTest(route=name):
+                self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+                self.assertGreater(row["queries_mean"], 0)
+                self.assertTrue(
+                    set(row["statuses"]) <= {200, 302}, row["statuses"]
+                )
+
+    def test_bench_compares_session_backends(self):
+        """--compare-sessions показывает запросы, сэкономленные кэшем."""
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "bench",
+                users=4,
+                groups=2,
+                posts=30,
+                follows=6,
+                comments=10,
+                requests=3,
+                route=["follow_index", "profile"],
+                compare_sessions=True,
+                in_place=True,
+                output=output.name,
+                stdout=StringIO(),
+            )
+            with open(output.name, encoding="utf-8") as source:
+                results = json.load(source)
+        for route in ("follow_index", "profile"):
+            with self.subTest(route=route):
+                cached = results["routes"][route]
+                stock = results["stock_sessions"][route]
+                # Сессия и пользователь; поиск профиля не считается.
+                self.assertEqual(cached["auth_queries_mean"], 0)
+                self.assertEqual(stock["auth_queries_mean"], 2)
@@ -0,0 +1,103 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import CompressionMiddleware
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+        for i in range(10):
+            Post.objects.create(author=cls.user, text=f"Пост {i}")
+        cls.post = Post.objects.create(author=cls.user, text="Сжимаемый пост")
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def run_middleware(response, **headers):
+        request = RequestFactory().get("/", **headers)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_feed_is_gzipped(self):
+        """Лента сжимается, если клиент принимает gzip."""
+        response = self.client.get(
+            reverse("posts:index"), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn(
+            "Сжимаемый пост", gzip.decompress(response.content).decode()
+        )
+
+    def test_without_accept_encoding_is_plain(self):
+        """Без Accept-Encoding ответ не сжимается."""
+        response = self.client.get(reverse("posts:index"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_csrf_page_is_not_compressed_by_default(self):
+        """Страница с CSRF-токеном по умолчанию отдаётся несжатой."""
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertContains(response, "csrfmiddlewaretoken")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESS_CSRF_PAGES="mask")
+    def test_csrf_page_is_masked(self):
+        """В режиме mask gzip-заголовок несёт случайное имя файла."""
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+            HTTP_ACCEPT_ENCODING="br, gzip",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        # Флаг FNAME в четвёртом байте gzip-заголовка.
+        self.assertTrue(response.content[3] & 0x08)
+        self.assertIn(
+            "csrfmiddlewaretoken", gzip.decompress(response.content).decode()
+        )
+
+    def test_small_and_binary_responses_are_left_alone(self):
+        """Короткие ответы и картинки не сжимаются."""
+        small = self.run_middleware(
+            HttpResponse("коротко"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertFalse(small.has_header("Content-Encoding"))
+        image = self.run_middleware(
+            HttpResponse(b"\x89PNG" * 1000, content_type="image/png"),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertFalse(image.has_header("Content-Encoding"))
+
+    def test_streaming_response_is_compressed_by_chunks(self):
+        """Потоковый ответ сжимается по кусочку, без Content-Length."""
+        chunks = [f"<p>строка {i}</p>".encode() * 50 for i in range(5)]
+        response = self.run_middleware(
+            StreamingHttpResponse(iter(chunks)), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), len(chunks))
+        self.assertEqual(gzip.decompress(b"".join(parts)), b"".join(chunks))
+
+    def test_strong_etag_is_weakened(self):
+        """Сжатый ответ получает слабый ETag."""
+        response = HttpResponse("<p>текст</p>" * 200)
+        response["ETag"] = '"abc"'
+        response = self.run_middleware(response, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["ETag"], 'W/"abc"')
@@ -1,6 +1,8 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import BytesIO
+from unittest import skipUnless
 
 
 from django.conf import settings
@@ -8,7 +10,9 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image, PngImagePlugin
 
+from posts import images
 from posts.forms import CommentForm, PostForm
 from posts.models import Comment, Group, Post
 
@@ -134,6 +138,90 @@ class PostFormTest(TestCase):
         self.assertEqual(Post.objects.count(), post_count)
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIZE=400)
+class PostImageIngestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="photographer")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name, image, image_format, **params):
+        buffer = BytesIO()
+        image.save(buffer, image_format, **params)
+        self.authorized_client.post(
+            reverse("posts:post_create"),
+            data={
+                "text": "Фото",
+                "image": SimpleUploadedFile(name, buffer.getvalue()),
+            },
+        )
+        return Post.objects.get(author=self.user)
+
+    def test_photo_is_resized_rotated_and_stripped(self):
+        """Фото уменьшается, поворачивается по EXIF и теряет метаданные."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: повернуть на 90° по часовой.
+        exif[0x010F] = "Камера"
+        post = self.upload(
+            "photo.jpeg",
+            Image.new("RGB", (1200, 600), "red"),
+            "JPEG",
+            exif=exif,
+        )
+        self.assertEqual(post.image.name, "posts/photo.jpg")
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, "JPEG")
+            self.assertEqual(stored.size, (200, 400))
+            self.assertFalse(stored.getexif())
+
+    @skipUnless(images.is_supported("WEBP"), "Pillow собран без WebP")
+    @override_settings(POST_IMAGE_FORMAT="WEBP")
+    def test_photo_format_follows_settings(self):
+        """Формат хранения фото задаётся настройкой."""
+        post = self.upload(
+            "photo.jpg", Image.new("RGB", (300, 300), "blue"), "JPEG"
+        )
+        self.assertEqual(post.image.name, "posts/photo.webp")
+
+    def test_png_stays_lossless(self):
+        """PNG уменьшается, но остаётся PNG с прозрачностью."""
+        post = self.upload(
+            "logo.png", Image.new("RGBA", (800, 800), (0, 0, 0, 0)), "PNG"
+        )
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, "PNG")
+            self.assertEqual(stored.mode, "RGBA")
+            self.assertEqual(stored.size, (400, 400))
+
+    def test_png_is_stripped(self):
+        """PNG теряет EXIF и текстовые метаданные."""
+        exif = Image.Exif()
+        exif[0x010F] = "Камера"
+        text = PngImagePlugin.PngInfo()
+        text.add_text("Comment", "координаты съёмки")
+        post = self.upload(
+            "logo.png",
+            Image.new("RGB", (800, 800), "green"),
+            "PNG",
+            exif=exif,
+            pnginfo=text,
+        )
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, "PNG")
+            self.assertFalse(stored.getexif())
+            self.assertNotIn("exif", stored.info)
+            self.assertNotIn("Comment", stored.info)
+
+
 class CommentFormTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,126 @@
+import re
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows, lookups
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+COUNTER_TABLES = re.compile(r'FROM "(posts_group|posts_authorstats)"')
+
+
+class LookupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="known", first_name="Имя", email="known@example.com"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="known-group", description="Описание"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_does_not_query(self):
+        """Повторный поиск берёт запись из кэша."""
+        with self.assertNumQueries(2):
+            lookups.user_by_username("known")
+            lookups.group_by_slug("known-group")
+        with self.assertNumQueries(0):
+            user = lookups.user_by_username("known")
+            group = lookups.group_by_slug("known-group")
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.get_full_name(), "Имя")
+        self.assertEqual(group.title, "Группа")
+
+    def test_cache_is_filled_from_primary(self):
+        """Кэши читают default, даже если роутер выбрал реплику."""
+        author = User.objects.create_user(username="followed")
+        Follow.objects.create(user=self.user, author=author)
+        cache.clear()
+        with mock.patch(
+            "core.db_router.ReplicaRouter.db_for_read",
+            return_value="replica",
+        ), self.assertNumQueries(3):
+            lookups.user_by_username("known")
+            lookups.group_by_slug("known-group")
+            follows.followed_authors(self.user)
+
+    def test_partial_instance_does_not_clobber_on_save(self):
+        """save() экземпляра из кэша не затирает незагруженные поля."""
+        user = lookups.user_by_username("known")
+        user.first_name = "Новое"
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "known@example.com")
+        self.assertEqual(
+            lookups.user_by_username("known").first_name, "Новое"
+        )
+
+    def test_missing_record_is_cached_until_created(self):
+        """Отсутствие кэшируется и сбрасывается созданием записи."""
+        with self.assertNumQueries(1):
+            self.assertIsNone(lookups.user_by_username("ghost"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(lookups.user_by_username("ghost"))
+            response = self.client.get(
+                reverse("posts:profile", kwargs={"username": "ghost"})
+            )
+        self.assertEqual(response.status_code, 404)
+        ghost = User.objects.create_user(username="ghost")
+        self.assertEqual(lookups.user_by_username("ghost").pk, ghost.pk)
+
+    def test_rename_and_delete_invalidate(self):
+        """Смена slug и удаление сбрасывают старые записи."""
+        lookups.group_by_slug("known-group")
+        self.group.slug = "renamed"
+        self.group.save()
+        self.assertIsNone(lookups.group_by_slug("known-group"))
+        self.assertEqual(lookups.group_by_slug("renamed").pk, self.group.pk)
+        self.group.delete()
+        self.assertIsNone(lookups.group_by_slug("renamed"))
+
+    def test_feed_pages_read_counters_from_lookup(self):
+        """group_list и profile берут счётчики постов из записи кэша."""
+        Post.objects.create(author=self.user, group=self.group, text="Пост")
+        urls = (
+            reverse("posts:group_list", kwargs={"slug": "known-group"}),
+            reverse("posts:profile", kwargs={"username": "known"}),
+        )
+        for url in urls:
+            self.client.get(url)
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, "Всего постов: 1")
+                self.assertFalse(
+                    [
+                        query["sql"]
+                        for query in queries
+                        if COUNTER_TABLES.search(query["sql"])
+                    ]
+                )
+
+    def test_post_write_refreshes_counters(self):
+        """Новый и удалённый пост меняют счётчики в записях кэша."""
+        def counts():
+            return (
+                lookups.group_by_slug("known-group").posts_count,
+                lookups.user_by_username("known").stats.posts_count,
+            )
+
+        self.assertEqual(counts(), (0, 0))
+        post = Post.objects.create(
+            author=self.user, group=self.group, text="Пост"
+        )
+        self.assertEqual(counts(), (1, 1))
+        post.delete()
+        self.assertEqual(counts(), (0, 0))
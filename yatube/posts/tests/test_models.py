@@ -1,8 +1,11 @@
+from io import StringIO
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import EXCERPT_LENGTH, AuthorStats, Comment, Group, Post
 
 
 User = get_user_model()
@@ -62,3 +65,77 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value
                 )
+
+    def test_excerpt_follows_text(self):
+        """excerpt пересчитывается при каждом сохранении текста."""
+        post = Post.objects.create(author=self.user, text="слово " * 200)
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.endswith("…"))
+        post.text = "Короткий"
+        post.save(update_fields=["text"])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, "Короткий")
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="counter")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="counter-group",
+            description="Тестовое описание",
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other-group",
+            description="Тестовое описание",
+        )
+
+    def counts(self, post=None):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        result = [
+            AuthorStats.objects.get(user=self.user).posts_count,
+            self.group.posts_count,
+            self.other_group.posts_count,
+        ]
+        if post is not None:
+            post.refresh_from_db()
+            result.append(post.comments_count)
+        return result
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании, переносе и удалении."""
+        post = Post.objects.create(
+            author=self.user, text="Тестовый пост", group=self.group
+        )
+        Comment.objects.create(post=post, author=self.user, text="Коммент")
+        self.assertEqual(self.counts(post), [1, 1, 0, 1])
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.counts(post), [1, 0, 1, 1])
+        post.comments.all().delete()
+        self.assertEqual(self.counts(post), [1, 0, 1, 0])
+        post.delete()
+        self.assertEqual(self.counts(), [0, 0, 0])
+
+    def test_missing_stats_row_is_created(self):
+        """Без строки AuthorStats первый пост заводит её с реальным числом."""
+        Post.objects.create(author=self.user, text="Первый пост")
+        AuthorStats.objects.filter(user=self.user).delete()
+        Post.objects.create(author=self.user, text="Второй пост")
+        self.assertEqual(self.counts()[0], 2)
+
+    def test_reconcile_counters_repairs_drift(self):
+        """Команда reconcile_counters исправляет разошедшиеся счётчики."""
+        post = Post.objects.create(
+            author=self.user, text="Тестовый пост", group=self.group
+        )
+        Comment.objects.create(post=post, author=self.user, text="Коммент")
+        AuthorStats.objects.update(posts_count=7)
+        Group.objects.update(posts_count=5)
+        Post.objects.update(comments_count=0)
+        call_command("reconcile_counters", stdout=StringIO())
+        self.assertEqual(self.counts(post), [1, 1, 0, 1])
@@ -0,0 +1,157 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.db_router import (
+    REPLICA_PIN_COOKIE,
+    ReplicaRouter,
+    available_replicas,
+    read_from_replica,
+    snapshot_database,
+    sync_replica,
+)
+
+from .. import generations
+from ..models import Post
+
+User = get_user_model()
+
+
+@read_from_replica
+def read_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@read_from_replica
+def write_view(request):
+    router.db_for_write(Post)
+    return HttpResponse(router.db_for_read(Post))
+
+
+@mock.patch("core.db_router.available_replicas", lambda: ["replica"])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_marked_views_read_from_replica(self):
+        """Помеченный view читает с реплики, остальной код — из default."""
+        response = read_view(self.factory.get("/"))
+        self.assertEqual(response.content, b"replica")
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(Post), DEFAULT_DB_ALIAS)
+
+    def test_write_pins_rest_of_request(self):
+        """После записи view дочитывает из default."""
+        response = write_view(self.factory.get("/"))
+        self.assertEqual(response.content, DEFAULT_DB_ALIAS.encode())
+
+    def test_pinned_user_reads_own_writes(self):
+        """Cookie закрепления отправляет чтение в default."""
+        request = self.factory.get("/")
+        request.COOKIES[REPLICA_PIN_COOKIE] = "1"
+        response = read_view(request)
+        self.assertEqual(response.content, DEFAULT_DB_ALIAS.encode())
+        response = read_view(self.factory.post("/"))
+        self.assertEqual(response.content, DEFAULT_DB_ALIAS.encode())
+
+    def test_write_request_sets_pin_cookie(self):
+        """Запрос с записью закрепляет пользователя за default."""
+        user = User.objects.create_user(username="writer")
+        post = Post.objects.create(author=user, text="Пост")
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("posts:add_comment", kwargs={"post_id": post.pk}),
+            {"text": "Комментарий"},
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse("posts:index"))
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_follow_by_get_sets_pin_cookie(self):
+        """Подписка пишет на GET и тоже закрепляет за default."""
+        user = User.objects.create_user(username="reader")
+        author = User.objects.create_user(username="followed")
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("posts:profile_follow", kwargs={"username": "followed"})
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertTrue(author.following.filter(user=user).exists())
+
+    def test_post_without_writes_does_not_pin(self):
+        """POST без записей в базу не закрепляет пользователя."""
+        user = User.objects.create_user(username="searcher")
+        self.client.force_login(user)
+        response = self.client.post(reverse("posts:post_create"), {})
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+
+class AvailableReplicasTest(TestCase):
+    def test_replica_files_checked_once(self):
+        """Файлы реплик проверяются один раз, а не на каждый запрос."""
+        available_replicas()
+        with mock.patch("core.db_router.os.path.exists") as exists:
+            reading = read_from_replica(
+                lambda request: ReplicaRouter().db_for_read(Post)
+            )
+            for _ in range(3):
+                reading(RequestFactory().get("/"))
+        exists.assert_not_called()
+
+
+class SyncReplicaTest(TestCase):
+    @mock.patch("core.db_router.snapshot_database", return_value=0)
+    def test_sync_renews_feed_generations(self, snapshot):
+        """Синхронизация реплики делает устаревшими кэш и ETag лент."""
+        before = generations.generation_tokens(generations.INDEX)
+        sync_replica("replica")
+        snapshot.assert_called_once()
+        self.assertNotEqual(
+            generations.generation_tokens(generations.INDEX), before
+        )
+
+
+class SnapshotDatabaseTest(TransactionTestCase):
+    def test_backup_snapshot_contains_rows(self):
+        """Снимок backup API содержит данные основной базы."""
+        user = User.objects.create_user(username="author")
+        Post.objects.create(author=user, text="Реплицируемый пост")
+        with tempfile.TemporaryDirectory() as directory:
+            target = str(Path(directory) / "replica.sqlite3")
+            self.assertGreater(snapshot_database(target), 0)
+            replica = sqlite3.connect(target)
+            try:
+                (text,) = replica.execute(
+                    "SELECT text FROM posts_post"
+                ).fetchone()
+            finally:
+                replica.close()
+        self.assertEqual(text, "Реплицируемый пост")
+
+    def test_snapshot_keeps_open_replica_connection(self):
+        """Открытое соединение с репликой видит новый снимок."""
+        user = User.objects.create_user(username="author")
+        with tempfile.TemporaryDirectory() as directory:
+            target = str(Path(directory) / "replica.sqlite3")
+            snapshot_database(target)
+            replica = sqlite3.connect(target)
+            try:
+                replica.execute("PRAGMA journal_mode=wal")
+                count = "SELECT COUNT(*) FROM posts_post"
+                self.assertEqual(replica.execute(count).fetchone(), (0,))
+                Post.objects.create(author=user, text="Новый пост")
+                snapshot_database(target)
+                self.assertEqual(replica.execute(count).fetchone(), (1,))
+                self.assertEqual(
+                    replica.execute("PRAGMA integrity_check").fetchone(),
+                    ("ok",),
+                )
+            finally:
+                replica.close()
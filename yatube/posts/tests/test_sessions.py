@@ -0,0 +1,116 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import auth
+from core.sessions import SessionStore, check_shared_cache
+
+User = get_user_model()
+AUTH_TABLES = re.compile(r'FROM "(django_session|auth_user)"')
+
+
+class CachedSessionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="reader", password="old-password-123"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username="reader", password="old-password-123")
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if AUTH_TABLES.search(query["sql"])
+        ]
+
+    def test_feed_request_skips_session_and_user_tables(self):
+        """Сессия и пользователь берутся из кэша, без запросов к базе."""
+        url = reverse("posts:follow_index")
+        self.client.get(url)
+        self.assertEqual(self.auth_queries(url), [])
+
+    def test_cached_user_has_no_password(self):
+        """В кэше пользователя нет хэша пароля."""
+        self.client.get(reverse("posts:follow_index"))
+        fields, session_hash = cache.get(auth.KEY.format(self.user.pk))
+        self.assertNotIn("password", fields)
+        self.assertNotIn(self.user.password, repr(fields))
+        self.assertEqual(session_hash, self.user.get_session_auth_hash())
+
+    def test_login_survives_cache_loss(self):
+        """Вход записан в базу сразу: потеря кэша не разлогинивает."""
+        cache.clear()
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_changes_are_written_behind(self):
+        """Обычные изменения попадают в базу не чаще интервала."""
+        store = SessionStore(self.client.session.session_key)
+        store["theme"] = "dark"
+        store.save()
+        row = Session.objects.get(session_key=store.session_key)
+        self.assertNotIn("theme", row.get_decoded())
+        self.assertEqual(SessionStore(store.session_key)["theme"], "dark")
+        with override_settings(SESSION_WRITE_BEHIND_SECONDS=0):
+            store["theme"] = "light"
+            store.save()
+        row = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(row.get_decoded()["theme"], "light")
+
+    def test_logout_drops_cached_session(self):
+        """Выход удаляет сессию и из кэша, и из базы."""
+        session_key = self.client.session.session_key
+        self.client.get(reverse("users:logout"))
+        self.assertFalse(SessionStore().exists(session_key))
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Смена пароля разлогинивает остальные сессии, но не свою."""
+        other = Client()
+        other.login(username="reader", password="old-password-123")
+        other.get(reverse("posts:follow_index"))
+        response = self.client.post(
+            reverse("users:password_change"),
+            {
+                "old_password": "old-password-123",
+                "new_password1": "new-password-456",
+                "new_password2": "new-password-456",
+            },
+        )
+        self.assertRedirects(response, reverse("users:password_change_done"))
+        self.assertEqual(
+            self.client.get(reverse("posts:follow_index")).status_code, 200
+        )
+        self.assertEqual(
+            other.get(reverse("posts:follow_index")).status_code, 302
+        )
+
+    @override_settings(
+        DEBUG=False,
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        },
+    )
+    def test_deploy_check_requires_shared_cache(self):
+        """Без DEBUG кэш в памяти процесса — ошибка проверки."""
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ["core.E001"])
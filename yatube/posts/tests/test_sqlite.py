@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.sqlite import check_sqlite_profile, effective_pragmas
+
+
+class SqliteProfileTest(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        """Новое соединение получает PRAGMA из настроек."""
+        values = effective_pragmas(connection)
+        self.assertEqual(values["synchronous"], 1)
+        self.assertEqual(values["temp_store"], 2)
+        self.assertEqual(
+            values["busy_timeout"], settings.SQLITE_PRAGMAS["busy_timeout"]
+        )
+        self.assertEqual(
+            values["cache_size"], settings.SQLITE_PRAGMAS["cache_size"]
+        )
+
+    def test_check_reports_effective_pragmas(self):
+        """Проверка выводит действующие значения без предупреждений."""
+        messages = check_sqlite_profile(None)
+        self.assertEqual([message.id for message in messages], ["core.I001"])
+
+    def test_check_warns_about_mismatch(self):
+        """Расхождение с настройками — предупреждение core.W001."""
+        pragmas = {**settings.SQLITE_PRAGMAS, "cache_size": -1}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            messages = check_sqlite_profile(None)
+        warnings = [m for m in messages if m.id == "core.W001"]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("cache_size", warnings[0].msg)
@@ -0,0 +1,78 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import StaticFilesMiddleware
+
+SOURCE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = "".join(f".rule-{i} {{ margin: {i}px; }}\n" for i in range(200))
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE="core.storage.CompressedManifestStaticFilesStorage",
+)
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, "css"))
+        with open(os.path.join(SOURCE_DIR, "css", "app.css"), "w") as f:
+            f.write(CSS)
+        with open(os.path.join(SOURCE_DIR, "tiny.js"), "w") as f:
+            f.write("1;")
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name("css/app.css")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_hashed_and_gzip(self):
+        """collectstatic пишет хэшированное имя и сжатую копию."""
+        self.assertRegex(self.hashed, r"^css/app\.[0-9a-f]{12}\.css$")
+        with open(os.path.join(STATIC_ROOT, self.hashed + ".gz"), "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), CSS)
+        tiny = staticfiles_storage.stored_name("tiny.js")
+        self.assertFalse(
+            os.path.exists(os.path.join(STATIC_ROOT, tiny + ".gz"))
+        )
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        """Хэшированный файл отдаётся сжатым и с immutable."""
+        response = self.client.get(
+            settings.STATIC_URL + self.hashed, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(body.decode(), CSS)
+
+    def test_plain_variant_without_accept_encoding(self):
+        """Без Accept-Encoding — исходный файл; без хэша — не immutable."""
+        response = self.client.get(settings.STATIC_URL + self.hashed)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        response = self.client.get(settings.STATIC_URL + "css/app.css")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_path_outside_root_is_not_served(self):
+        """Путь за пределы STATIC_ROOT уходит дальше по цепочке."""
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse("x"))
+        request = RequestFactory().get(settings.STATIC_URL + "../manage.py")
+        response = middleware(request)
+        self.assertEqual(response.content, b"x")
@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from .. import thumbnails
+from ..models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailLookupTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="thumb_author")
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text="Тестовый пост с картинкой",
+            image=SimpleUploadedFile(
+                name="thumb.gif", content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        thumbnails._lru.clear()
+        self.client = Client()
+
+    def test_pending_thumbnail_renders_placeholder(self):
+        """Пока миниатюры нет, страница показывает заглушку."""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertIsNone(thumbnails.lookup(post))
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        self.assertContains(response, "bg-light")
+        self.assertNotContains(response, "<img class=\"card-img")
+
+    def test_failed_image_is_not_rescheduled(self):
+        """Упавшая картинка не ставится в очередь на каждом рендере."""
+        post = Post.objects.get(pk=self.post.pk)
+        thumbnails._slots.acquire()
+        with mock.patch.object(
+            thumbnails, "get_thumbnail", side_effect=OSError
+        ), mock.patch.object(thumbnails, "connection"), self.assertLogs(
+            thumbnails.logger
+        ):
+            thumbnails._generate(post.image.name, post)
+        with mock.patch.object(thumbnails, "schedule") as schedule:
+            thumbnails.resolve([Post.objects.get(pk=self.post.pk)])
+        schedule.assert_not_called()
+
+    def test_ready_thumbnail_is_only_looked_up(self):
+        """Готовая миниатюра находится без повторной генерации."""
+        expected = get_thumbnail(
+            self.post.image, thumbnails.GEOMETRY, **thumbnails.OPTIONS
+        )
+        found = thumbnails.lookup(Post.objects.get(pk=self.post.pk))
+        self.assertEqual(found.name, expected.name)
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        self.assertContains(response, expected.url)
+
+    def test_picture_lists_every_rendition(self):
+        """<picture> перечисляет все размеры каждого формата в srcset."""
+        for _, _, geometry, options in thumbnails.renditions():
+            get_thumbnail(self.post.image, geometry, **options)
+        post = Post.objects.get(pk=self.post.pk)
+        thumbnails.resolve([post])
+        self.assertEqual(set(post.renditions), set(thumbnails.formats()))
+        for sizes in post.renditions.values():
+            self.assertEqual(
+                [width for width, _ in sizes], [480, 960, 1440]
+            )
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        self.assertContains(response, "<picture>")
+        self.assertContains(response, '<source type="image/jpeg"')
+        for width, thumbnail in post.renditions["JPEG"]:
+            self.assertContains(response, f"{thumbnail.url} {width}w")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailBatchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="batch_author")
+        for i in range(3):
+            post = Post.objects.create(
+                author=cls.user,
+                text=f"Тестовый пост {i}",
+                image=SimpleUploadedFile(
+                    name=f"batch{i}.gif",
+                    content=SMALL_GIF,
+                    content_type="image/gif",
+                ),
+            )
+            get_thumbnail(
+                post.image, thumbnails.GEOMETRY, **thumbnails.OPTIONS
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        thumbnails._lru.clear()
+
+    def test_page_resolved_with_one_query(self):
+        """Миниатюры страницы находятся одним запросом, затем из LRU."""
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            thumbnails.resolve(posts)
+        self.assertTrue(all(post.thumbnail for post in posts))
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(0):
+            thumbnails.resolve(posts)
+        stats = thumbnails.lru_stats()
+        self.assertEqual(stats["hits"], len(posts))
+        self.assertEqual(stats["size"], len(posts))
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import QueryBudgetExceeded
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="Описание"
+        )
+        for i in range(12):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f"Пост {i}"
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_server_timing_header(self):
+        """Ответ содержит метрики SQL, шаблонов и миниатюр."""
+        response = self.client.get(reverse("posts:index"))
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "thumb;dur=", "total;dur="):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_views_fit_query_budgets(self):
+        """Ленты на холодном кэше укладываются в свои бюджеты."""
+        post = Post.objects.first()
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": "author"}),
+            reverse("posts:post_detail", kwargs={"post_id": post.pk}),
+            reverse("posts:follow_index"),
+            reverse("posts:post_search") + "?q=Пост",
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(
+        QUERY_BUDGET_STRICT=True, VIEW_QUERY_BUDGETS={"posts:profile": 1}
+    )
+    def test_strict_budget_fails_request(self):
+        """Превышение бюджета в строгом режиме роняет запрос."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(
+                reverse("posts:profile", kwargs={"username": "author"})
+            )
+
+    @override_settings(VIEW_QUERY_BUDGETS={"posts:profile": 1})
+    def test_budget_overrun_is_logged(self):
+        """Без строгого режима превышение только пишется в лог."""
+        with self.assertLogs("yatube.timing", "WARNING") as logs:
+            response = self.client.get(
+                reverse("posts:profile", kwargs={"username": "author"})
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("posts:profile", logs.output[0])
@@ -0,0 +1,119 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+
+class TransferCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="writer")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Путешествия", slug="travel", description="Описание"
+        )
+        for i in range(5):
+            post = Post.objects.create(
+                author=cls.author,
+                group=cls.group if i % 2 else None,
+                text=f"Запись {i}",
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text=f"Ответ {i}"
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self):
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as output:
+            call_command(
+                "export_data",
+                output=output.name,
+                chunk_size=2,
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+            with open(output.name, encoding="utf-8") as source:
+                return source.read()
+
+    def load(self, data, **options):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as source:
+            source.write(data)
+            source.flush()
+            call_command(
+                "import_data", source.name, stdout=StringIO(), **options
+            )
+
+    def snapshot(self):
+        return (
+            set(
+                Post.objects.values_list(
+                    "author__username", "group__slug", "text", "pub_date"
+                )
+            ),
+            set(
+                Comment.objects.values_list(
+                    "post__text", "author__username", "text", "created"
+                )
+            ),
+            set(
+                Follow.objects.values_list(
+                    "user__username", "author__username"
+                )
+            ),
+        )
+
+    def test_export_is_jsonl_in_dependency_order(self):
+        """Выгрузка — по строке на запись, группы и посты первыми."""
+        lines = self.export().splitlines()
+        models = [json.loads(line)["model"] for line in lines]
+        self.assertEqual(
+            models, ["group"] + ["post"] * 5 + ["comment"] * 5 + ["follow"]
+        )
+
+    def test_round_trip_restores_rows(self):
+        """Импорт выгрузки восстанавливает посты, даты и связи."""
+        expected = self.snapshot()
+        data = self.export()
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        Group.objects.all().delete()
+        self.load(data, batch_size=2)
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 5
+        )
+        post = Post.objects.filter(comments__isnull=False).first()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_import_creates_missing_users(self):
+        """Неизвестные авторы создаются по username."""
+        data = self.export().replace('"writer"', '"newcomer"')
+        self.load(data)
+        newcomer = User.objects.get(username="newcomer")
+        self.assertFalse(newcomer.has_usable_password())
+        self.assertEqual(newcomer.posts.count(), 5)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_import_next_to_existing_posts(self):
+        """Импорт в непустую базу: id выдаёт база, связи не путаются."""
+        data = self.export()
+        Post.objects.filter(text="Запись 0").delete()
+        self.load(data.replace("Запись", "Копия"), batch_size=3)
+        self.assertEqual(Post.objects.count(), 9)
+        for comment in Comment.objects.filter(text__startswith="Ответ"):
+            with self.subTest(comment=comment.text):
+                number = comment.text.split()[-1]
+                self.assertEqual(
+                    comment.post.text.split()[-1], number, comment.post.text
+                )
+        copy = Post.objects.get(text="Копия 0")
+        self.assertLess(copy.pub_date, Post.objects.latest("pk").updated)
+        self.assertTrue(Post._meta.get_field("pub_date").auto_now_add)
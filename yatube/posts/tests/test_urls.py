@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 
@@ -118,6 +119,7 @@ class FollowersTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.authorized_author = Client()
         self.authorized_author.force_login(FollowersTests.user)
         self.follower = Client()
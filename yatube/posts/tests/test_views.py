@@ -1,15 +1,21 @@
 import shutil
 import tempfile
+from io import StringIO
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Follow, Group, Post
+from .. import cards, feed, follows, generations
+from ..models import Comment, FeedEntry, Follow, Group, Post
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 User = get_user_model()
@@ -221,9 +227,8 @@ class PostViewsTest(TestCase):
         )
 
     def test_cache_after_post_delete(self):
-        """Проверка, что при удалении записи из базы, она остаётся в
-        response.content главной страницы до тех пор, пока кэш не будет
-        очищен принудительно"""
+        """Проверка, что удалённая запись сразу пропадает с главной
+        страницы: удаление меняет поколение кэша ленты."""
         post = Post.objects.create(
             author=PostViewsTest.user_author,
             text="Тестовый пост для проверки кеша",
@@ -234,10 +239,36 @@ class PostViewsTest(TestCase):
         self.assertEqual(check_post, post)
         post.delete()
         response_2 = self.authorized_client_author.get(reverse("posts:index"))
-        self.assertEqual(response_2.content, response.content)
-        cache.clear()
-        response_3 = self.authorized_client_author.get(reverse("posts:index"))
-        self.assertNotEqual(response_3.content, response.content)
+        self.assertNotEqual(response_2.content, response.content)
+        self.assertNotContains(response_2, post.text)
+
+    def test_feed_cards_cached_until_write(self):
+        """Карточки лент берутся из кэша, пока посты не менялись."""
+        urls = (
+            reverse("posts:index"),
+            reverse(
+                "posts:group_list", kwargs={"slug": PostViewsTest.group.slug}
+            ),
+            reverse(
+                "posts:profile",
+                kwargs={"username": PostViewsTest.user_author.username},
+            ),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                self.guest_client.get(url)
+                Post.objects.filter(pk=PostViewsTest.post.pk).update(
+                    text="Изменено в обход сигналов"
+                )
+                response = self.guest_client.get(url)
+                self.assertContains(response, PostViewsTest.post.text)
+                post = Post.objects.get(pk=PostViewsTest.post.pk)
+                post.save()
+                response = self.guest_client.get(url)
+                self.assertContains(response, "Изменено в обход сигналов")
+                post.text = PostViewsTest.post.text
+                post.save()
 
 
 class PaginatorViewsTest(TestCase):
@@ -305,6 +336,7 @@ class FollowersTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.authorized_author = Client()
         self.authorized_author.force_login(FollowersTests.user)
         self.follower = Client()
@@ -335,3 +367,598 @@ class FollowersTests(TestCase):
         response = self.follower.get(reverse("posts:follow_index"))
         post_list = response.context["page_obj"]
         self.assertNotIn(check_post, post_list)
+
+    def test_follow_backfills_and_unfollow_prunes_feed(self):
+        """Подписка добавляет старые посты в ленту, отписка убирает их."""
+        check_post = self.check_post_for_following()
+        self.follower.get(
+            reverse(
+                "posts:profile_follow",
+                kwargs={"username": FollowersTests.user.username},
+            )
+        )
+        response = self.follower.get(reverse("posts:follow_index"))
+        self.assertIn(check_post, response.context["page_obj"])
+        self.follower.get(
+            reverse(
+                "posts:profile_unfollow",
+                kwargs={"username": FollowersTests.user.username},
+            )
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(user=FollowersTests.user_2).exists()
+        )
+
+    def test_follow_status_comes_from_cached_graph(self):
+        """Статус подписки читается из кэша и обновляется при записи."""
+        author = FollowersTests.user
+        profile_url = reverse(
+            "posts:profile", kwargs={"username": author.username}
+        )
+        self.assertFalse(follows.is_following(self.user_2, author.pk))
+        with self.assertNumQueries(0):
+            follows.is_following(self.user_2, author.pk)
+        self.follower.get(
+            reverse(
+                "posts:profile_follow", kwargs={"username": author.username}
+            )
+        )
+        self.assertTrue(follows.is_following(self.user_2, author.pk))
+        self.assertTrue(self.follower.get(profile_url).context["following"])
+        self.follower.get(
+            reverse(
+                "posts:profile_unfollow",
+                kwargs={"username": author.username},
+            )
+        )
+        self.assertFalse(self.follower.get(profile_url).context["following"])
+
+    def test_follow_and_unfollow_ignore_stale_graph(self):
+        """Подписка и отписка пишут в базу, даже если кэш графа отстал."""
+        author = FollowersTests.user
+        follow_url = reverse(
+            "posts:profile_follow", kwargs={"username": author.username}
+        )
+        unfollow_url = reverse(
+            "posts:profile_unfollow", kwargs={"username": author.username}
+        )
+        self.follower.get(follow_url)
+        Follow.objects.all().delete()
+        cache.set(
+            follows.KEY.format(self.user_2.pk), frozenset([author.pk]), None
+        )
+        self.follower.get(follow_url)
+        self.assertTrue(
+            Follow.objects.filter(user=self.user_2, author=author).exists()
+        )
+        cache.set(follows.KEY.format(self.user_2.pk), frozenset(), None)
+        self.follower.get(unfollow_url)
+        self.assertFalse(
+            Follow.objects.filter(user=self.user_2, author=author).exists()
+        )
+        self.assertFalse(follows.is_following(self.user_2, author.pk))
+
+    def test_follow_refreshes_graph_once(self):
+        """Подписку и отписку в графе отражает один сигнал Follow."""
+        author = FollowersTests.user
+        for name in ("posts:profile_follow", "posts:profile_unfollow"):
+            with mock.patch.object(
+                follows, "refresh", wraps=follows.refresh
+            ) as refresh:
+                self.follower.get(
+                    reverse(name, kwargs={"username": author.username})
+                )
+            self.assertEqual(refresh.call_count, 1)
+
+    def test_follow_badge_is_outside_shared_card(self):
+        """Метка подписки видна подписчику, но не попадает в карточку."""
+        Follow.objects.create(
+            user=FollowersTests.user_2, author=FollowersTests.user
+        )
+        self.check_post_for_following()
+        for url in (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.follower.get(url), "подписка")
+                self.assertNotContains(self.client.get(url), "подписка")
+
+    def test_following_many_marks_page_authors(self):
+        """Пакетная проверка подписки по всем авторам страницы."""
+        Follow.objects.create(user=self.user_2, author=self.user)
+        with self.assertNumQueries(1):
+            statuses = follows.following_many(
+                self.user_2, [self.user.pk, self.user_2.pk]
+            )
+        self.assertEqual(
+            statuses, {self.user.pk: True, self.user_2.pk: False}
+        )
+
+    def test_rebuild_feeds_command_repairs_feed(self):
+        """Команда rebuild_feeds восстанавливает ленты из подписок."""
+        Follow.objects.create(
+            user=FollowersTests.user_2, author=FollowersTests.user
+        )
+        check_post = self.check_post_for_following()
+        FeedEntry.objects.all().delete()
+        call_command("rebuild_feeds", stdout=StringIO())
+        response = self.follower.get(reverse("posts:follow_index"))
+        self.assertIn(check_post, response.context["page_obj"])
+
+
+@override_settings(POSTS_PAGINATION_MODE="cursor")
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="cursor_user")
+        cls.group = Group.objects.create(
+            title="Тестовый группа",
+            slug="test-slug",
+            description="Тестовое описание группы",
+        )
+        Post.objects.bulk_create(
+            Post(text=f"Тестовый пост {i}", author=cls.user, group=cls.group)
+            for i in range(CREATE_POST_QUANTITY)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        """Курсоры вперёд и назад обходят ленту без пропусков и повторов."""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user}),
+        )
+        expected = list(Post.objects.order_by("-pub_date", "-id"))
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.authorized_client.get(url).context["page_obj"]
+                self.assertEqual(
+                    len(first), PAGINATOR_FIRST_PAGE_POSTS_QUANTITY
+                )
+                self.assertFalse(first.has_previous())
+                second = self.authorized_client.get(
+                    url, {"cursor": first.next_cursor}
+                ).context["page_obj"]
+                self.assertEqual(
+                    len(second), PAGINATOR_SECOND_PAGE_POSTS_QUANTITY
+                )
+                self.assertFalse(second.has_next())
+                self.assertEqual(list(first) + list(second), expected)
+                back = self.authorized_client.get(
+                    url, {"cursor": second.previous_cursor}
+                ).context["page_obj"]
+                self.assertEqual(list(back), list(first))
+
+    def test_follow_feed_pages_read_feed_index(self):
+        """Лента подписок листается по записям ленты, без join с постами."""
+        reader = User.objects.create_user(username="cursor_reader")
+        Follow.objects.create(user=reader, author=self.user)
+        feed.rebuild_feeds([reader.pk])
+        client = Client()
+        client.force_login(reader)
+        url = reverse("posts:follow_index")
+        first = client.get(url).context["page_obj"]
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(
+                url, {"cursor": first.next_cursor}
+            ).context["page_obj"]
+        self.assertEqual(
+            list(first) + list(second),
+            list(Post.objects.order_by("-pub_date", "-id")),
+        )
+        range_reads = [
+            query["sql"]
+            for query in queries
+            if 'FROM "posts_feedentry"' in query["sql"]
+        ]
+        self.assertEqual(len(range_reads), 1)
+        self.assertNotIn("posts_post", range_reads[0])
+
+    def test_cursor_page_does_not_count(self):
+        """Страница курсора строится одним запросом без COUNT."""
+        page = self.client.get(reverse("posts:index")).context["page_obj"]
+        paginator = page.paginator
+        self.assertFalse(hasattr(paginator, "count"))
+        self.assertFalse(hasattr(paginator, "num_pages"))
+        with self.assertNumQueries(1):
+            paginator.get_page(page.next_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый токен отдаёт первую страницу."""
+        response = self.client.get(
+            reverse("posts:index"), {"cursor": "не-курсор"}
+        )
+        self.assertEqual(
+            len(response.context["page_obj"]),
+            PAGINATOR_FIRST_PAGE_POSTS_QUANTITY,
+        )
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="etag_author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="etag-slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text="Тестовый пост", group=cls.group
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user}),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+        )
+
+    def test_unchanged_page_returns_not_modified(self):
+        """Повторный запрос с ETag получает 304 без пагинации."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response.has_header("Last-Modified"))
+                # Группа и автор берутся из кэша поиска, пост — из базы.
+                with self.assertNumQueries(1 if "/posts/" in url else 0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        """Новый пост или комментарий меняет ETag страниц."""
+        etags = {url: self.guest_client.get(url)["ETag"] for url in self.urls}
+        Post.objects.create(
+            author=self.user, text="Ещё пост", group=self.group
+        )
+        Comment.objects.create(post=self.post, author=self.user, text="Ок")
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        """Разные зрители получают разные ETag."""
+        url = reverse("posts:index")
+        self.assertNotEqual(
+            self.guest_client.get(url)["ETag"],
+            self.authorized_client.get(url)["ETag"],
+        )
+
+    def test_follow_changes_post_detail_etag(self):
+        """Подписка на автора меняет ETag страницы его поста."""
+        reader = User.objects.create_user(username="etag_reader")
+        client = Client()
+        client.force_login(reader)
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        etag = client.get(url)["ETag"]
+        client.get(
+            reverse("posts:profile_follow", kwargs={"username": self.user})
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["following"])
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="search_author")
+        cls.group = Group.objects.create(
+            title="Путешествия",
+            slug="travel",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text="Поездка на Байкал зимой", group=cls.group
+        )
+        Post.objects.bulk_create(
+            Post(text=f"Запись про озеро {i}", author=cls.user)
+            for i in range(CREATE_POST_QUANTITY)
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse("posts:post_search"), {"q": query, **params}
+        ).context["page_obj"]
+
+    def test_search_matches_text_and_group_title(self):
+        """Поиск находит пост по словам текста и названию группы."""
+        self.assertEqual(list(self.search("байкал")), [self.post])
+        self.assertEqual(list(self.search("путешеств")), [self.post])
+        self.assertEqual(list(self.search('"; DROP')), [])
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.create(author=self.user, text="Северное сияние")
+        self.assertEqual(list(self.search("сияние")), [post])
+        post.text = "Полярная ночь"
+        post.save()
+        self.assertEqual(list(self.search("сияние")), [])
+        post.delete()
+        self.assertEqual(list(self.search("полярная")), [])
+
+    def test_control_characters_are_ignored(self):
+        """Управляющие символы в запросе не ломают MATCH."""
+        self.assertEqual(list(self.search("\x00")), [])
+        self.assertEqual(list(self.search("байкал\x00")), [self.post])
+
+    def test_group_rename_updates_index(self):
+        """Новое название группы ищется, старое — нет."""
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = "Экспедиции"
+        group.save()
+        self.assertEqual(list(self.search("экспедиц")), [self.post])
+        self.assertEqual(list(self.search("путешеств")), [])
+        group.delete()
+        self.assertEqual(list(self.search("экспедиц")), [])
+
+    def test_group_save_without_rename_keeps_posts(self):
+        """Сохранение группы без смены названия не трогает её посты."""
+        group = Group.objects.get(pk=self.group.pk)
+        group.description = "Новое описание"
+        with CaptureQueriesContext(connection) as queries:
+            group.save()
+        self.assertFalse(
+            [q for q in queries if "posts_post" in q["sql"]]
+        )
+
+    def test_search_results_are_keyset_paginated(self):
+        """Выдача листается курсором без повторов."""
+        first = self.search("озеро")
+        self.assertEqual(len(first), PAGINATOR_FIRST_PAGE_POSTS_QUANTITY)
+        second = self.search("озеро", cursor=first.next_cursor)
+        self.assertEqual(len(second), PAGINATOR_SECOND_PAGE_POSTS_QUANTITY)
+        self.assertFalse(second.has_next())
+        self.assertFalse(set(first) & set(second))
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="commentator")
+        cls.post = Post.objects.create(author=cls.user, text="Обсуждаемый")
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f"Комментарий {i}")
+            for i in range(12)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_comments_only(self):
+        """Пост показывает первую порцию новых комментариев."""
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        comments = response.context["comments"]
+        self.assertEqual(
+            list(comments),
+            list(self.post.comments.order_by("-created", "-id")[:5]),
+        )
+        self.assertContains(
+            response,
+            reverse("posts:post_comments", kwargs={"post_id": self.post.pk}),
+        )
+
+    def test_post_detail_cost_does_not_depend_on_thread(self):
+        """Число запросов поста не растёт вместе с веткой."""
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text="Ещё")
+            for _ in range(50)
+        )
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    def test_comment_fragments_cover_thread(self):
+        """Фрагменты по курсору отдают всю ветку без повторов."""
+        url = reverse("posts:post_comments", kwargs={"post_id": self.post.pk})
+        seen = []
+        cursor = None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            response = self.client.get(url, params)
+            self.assertTemplateUsed(response, "posts/includes/comments.html")
+            page = response.context["comments"]
+            seen.extend(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(
+            seen, list(self.post.comments.order_by("-created", "-id"))
+        )
+
+    def test_comment_fragment_for_missing_post(self):
+        """Фрагмент несуществующего поста — 404."""
+        response = self.client.get(
+            reverse("posts:post_comments", kwargs={"post_id": 10 ** 6})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="carded", first_name="Иван"
+        )
+        cls.group = Group.objects.create(title="Карточки", slug="cards")
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text="Карточка"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_card_is_shared_by_feeds(self):
+        """Все ленты показывают одну закэшированную карточку поста."""
+        self.client.get(reverse("posts:index"))
+        self.post.refresh_from_db()
+        self.assertIsNotNone(cache.get(cards.card_key(self.post)))
+        for url in (
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": "carded"}),
+        ):
+            response = self.client.get(url)
+            self.assertTemplateNotUsed(response, cards.TEMPLATE)
+            self.assertContains(response, "Карточка")
+
+    def test_page_fetches_cards_at_once(self):
+        """Страница ленты берёт все карточки одним get_many."""
+        self.client.get(reverse("posts:index"))
+        with mock.patch.object(
+            cards.cache, "get_many", wraps=cards.cache.get_many
+        ) as get_many:
+            response = self.client.get(reverse("posts:index"))
+        self.post.refresh_from_db()
+        card_fetches = [
+            call
+            for call in get_many.call_args_list
+            if cards.card_key(self.post) in call[0][0]
+        ]
+        self.assertEqual(len(card_fetches), 1)
+        self.assertTemplateNotUsed(response, cards.TEMPLATE)
+
+    def test_touch_rerenders_card_in_feed(self):
+        """cards.touch() сразу меняет карточку в ленте."""
+        url = reverse("posts:index")
+        self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(
+            excerpt="В обход сигналов"
+        )
+        cards.touch(Post.objects.filter(pk=self.post.pk))
+        self.assertContains(self.client.get(url), "В обход сигналов")
+
+    def test_edit_rerenders_card(self):
+        """Изменённый пост получает новую карточку."""
+        self.client.get(reverse("posts:index"))
+        self.post.text = "Исправленная"
+        self.post.save()
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "Исправленная")
+        self.assertIsNotNone(cache.get(cards.card_key(self.post)))
+
+    def test_author_rename_rerenders_card(self):
+        """Смена имени автора меняет метку его постов."""
+        url = reverse("posts:profile", kwargs={"username": "carded"})
+        self.client.get(url)
+        updated = self.post.updated
+        self.user.first_name = "Пётр"
+        self.user.save()
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, updated)
+        self.assertIsNone(cache.get(cards.card_key(self.post)))
+        self.assertContains(self.client.get(url), "Пётр")
+
+    def test_author_rename_refreshes_all_feeds(self):
+        """Новое имя автора видно во всех лентах с его постами."""
+        reader = User.objects.create_user(username="card-reader")
+        Follow.objects.create(user=reader, author=self.user)
+        self.client.force_login(reader)
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:follow_index"),
+        )
+        etags = [self.client.get(url).get("ETag", "") for url in urls]
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Семён"
+        user.save()
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertContains(response, "Семён")
+
+    def test_group_rename_refreshes_index(self):
+        """Новый адрес группы сразу виден в общей ленте."""
+        url = reverse("posts:index")
+        etag = self.client.get(url)["ETag"]
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = "cards-renamed"
+        group.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(
+            response,
+            reverse("posts:group_list", kwargs={"slug": "cards-renamed"}),
+        )
+
+    def test_save_without_rename_keeps_card(self):
+        """Сохранение пользователя без смены имён не трогает карточки."""
+        self.post.refresh_from_db()
+        updated = self.post.updated
+        user = User.objects.get(pk=self.user.pk)
+        user.email = "carded@example.com"
+        user.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
+
+    def test_login_keeps_author_feeds(self):
+        """Вход (запись last_login) не сбрасывает ленты автора."""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password("card-password-1")
+        user.save()
+        scope = generations.author_scope(self.user.pk)
+        before = generations.generation_tokens(scope)
+        self.assertTrue(
+            self.client.login(username="carded", password="card-password-1")
+        )
+        self.assertEqual(generations.generation_tokens(scope), before)
+
+
+class ExcerptFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="writer")
+        cls.post = Post.objects.create(
+            author=cls.user, text="начало " + "длинного текста " * 2000
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_show_excerpt_without_loading_text(self):
+        """Ленты показывают начало текста и не читают text из базы."""
+        for url in (
+            reverse("posts:index"),
+            reverse("posts:profile", kwargs={"username": "writer"}),
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, self.post.excerpt)
+                self.assertNotContains(response, self.post.text)
+                sql = " ".join(
+                    query["sql"] for query in queries.captured_queries
+                )
+                self.assertNotIn('"posts_post"."text"', sql)
+
+    def test_post_detail_shows_full_text(self):
+        """Полный текст остаётся на странице поста."""
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        self.assertContains(response, self.post.text.strip())
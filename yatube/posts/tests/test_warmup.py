@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.warmup import template_names, warm_up
+
+# Без DEBUG Django включает cached.Loader сам.
+CACHED_TEMPLATES = [
+    {
+        **settings.TEMPLATES[0],
+        "OPTIONS": {**settings.TEMPLATES[0]["OPTIONS"], "debug": False},
+    }
+]
+
+
+class WarmupTest(SimpleTestCase):
+    def test_compiles_every_project_template(self):
+        """Прогрев загружает все шаблоны из templates/."""
+        names = list(template_names(settings.TEMPLATES_DIR))
+        self.assertIn("base.html", names)
+        self.assertIn("posts/includes/post_card.html", names)
+        report = {name: count for name, count, _ in warm_up()}
+        self.assertEqual(report["templates"], len(names))
+        self.assertEqual(set(report), {"templates", "imports", "urls"})
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_templates_stay_in_cached_loader(self):
+        """С кэширующим загрузчиком шаблоны остаются в памяти."""
+        warm_up()
+        loader = engines.all()[0].engine.template_loaders[0]
+        cached = set(loader.get_template_cache)
+        self.assertIn("posts/index.html", cached)
+        self.assertIn("posts/includes/paginator.html", cached)
+
+    def test_command_reports_steps(self):
+        """Команда warmup печатает время каждого шага."""
+        out = StringIO()
+        call_command("warmup", stdout=out)
+        for step in ("templates", "imports", "urls"):
+            self.assertIn(f"{step}:", out.getvalue())
@@ -0,0 +1,304 @@
+"""Фоновая генерация миниатюр постов.
+
+Все размеры и форматы миниатюры (renditions()) строятся в пуле потоков
+сразу после сохранения картинки, а шаблоны только ищут готовый
+результат в KVStore sorl-thumbnail.
+Пока задача не выполнена, шаблон показывает заглушку, а по готовности
+меняются метка поста и поколения его лент, чтобы карточка и ETag
+с заглушкой устарели.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE,
+    KVStore as CachedDbKVStore,
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.timing import timed
+
+from . import generations, images
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = "960x339"
+OPTIONS = {"crop": "center", "upscale": True}
+
+# Именованные размеры миниатюр по возрастанию ширины, пропорция одна.
+RENDITIONS = {
+    "sm": "480x170",
+    "md": GEOMETRY,
+    "lg": "1440x508",
+}
+DEFAULT_RENDITION = "md"
+# Картинка, миниатюры которой не построились: не ставить её в очередь
+# на каждом рендере до истечения POST_THUMBNAIL_RETRY_SECONDS.
+FAILED_KEY = "thumbnail-failed:{}"
+
+
+def formats():
+    """Форматы миниатюр: WebP, если Pillow его умеет, и JPEG для всех."""
+    if images.is_supported("WEBP"):
+        return ("WEBP", "JPEG")
+    return ("JPEG",)
+
+
+def renditions():
+    """[(имя, формат, геометрия, опции)] всех миниатюр одной картинки."""
+    return [
+        (name, image_format, geometry, {**OPTIONS, "format": image_format})
+        for name, geometry in RENDITIONS.items()
+        for image_format in formats()
+    ]
+
+
+class LookupThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, умеющий только искать готовую миниатюру."""
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры, который построил бы get_thumbnail."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def lookup_many(self, requests):
+        """Ищет миниатюры одним multi-get.
+
+        requests — {ключ: (файл, геометрия, опции)}; возвращает
+        {ключ: миниатюра или None}.
+        """
+        keys = {
+            request: add_prefix(
+                self.thumbnail_file(file_, geometry, **options).key
+            )
+            for request, (file_, geometry, options) in requests.items()
+        }
+        result = dict.fromkeys(keys)
+        cached = _lru.get_many(keys.values())
+        missing = {
+            key: request
+            for request, key in keys.items()
+            if key not in cached
+        }
+        for request, key in keys.items():
+            if key in cached:
+                result[request] = cached[key]
+        if not missing:
+            return result
+        kvstore = default.kvstore
+        if isinstance(kvstore, CachedDbKVStore):
+            raw = kvstore.cache.get_many(missing)
+            absent = [key for key in missing if key not in raw]
+            if absent:
+                stored = dict(
+                    KVStoreModel.objects.filter(key__in=absent).values_list(
+                        "key", "value"
+                    )
+                )
+                raw.update(stored)
+                kvstore.cache.set_many(
+                    {key: stored.get(key, EMPTY_VALUE) for key in absent},
+                    thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+                )
+            found = {
+                key: deserialize_image_file(value)
+                for key, value in raw.items()
+                if value and value != EMPTY_VALUE
+            }
+        else:
+            found = {}
+            for key in missing:
+                value = kvstore._get_raw(key)
+                if value:
+                    found[key] = deserialize_image_file(value)
+        _lru.set_many(found)
+        for key, thumbnail in found.items():
+            result[missing[key]] = thumbnail
+        return result
+
+
+class LRUCache:
+    """Потокобезопасный LRU в памяти процесса со статистикой."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def set_many(self, items):
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+_lru = LRUCache(settings.POST_THUMBNAIL_LRU_SIZE)
+
+
+backend = LookupThumbnailBackend()
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.POST_THUMBNAIL_WORKERS,
+    thread_name_prefix="post-thumbnails",
+)
+_slots = threading.BoundedSemaphore(settings.POST_THUMBNAIL_QUEUE_SIZE)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _generate(name, post):
+    try:
+        for _, _, geometry, options in renditions():
+            get_thumbnail(name, geometry, **options)
+        # Новая метка вытесняет закэшированную карточку с заглушкой.
+        Post.objects.filter(pk=post.pk).update(updated=timezone.now())
+        generations.bump_post(post)
+    except Exception:
+        logger.exception("Не удалось построить миниатюры %s", name)
+        cache.set(
+            _failed_key(name), True, settings.POST_THUMBNAIL_RETRY_SECONDS
+        )
+    finally:
+        connection.close()
+        with _pending_lock:
+            _pending.discard(name)
+        _slots.release()
+
+
+def _failed_key(name):
+    # Хэш: имя файла может быть длиннее допустимого ключа.
+    return FAILED_KEY.format(md5(name.encode()).hexdigest())
+
+
+def _submit(name, post):
+    with _pending_lock:
+        if name in _pending:
+            return
+        if not _slots.acquire(blocking=False):
+            logger.warning("Очередь миниатюр заполнена, %s пропущен", name)
+            return
+        _pending.add(name)
+    _executor.submit(_generate, name, post)
+
+
+def schedule(post):
+    """Ставит построение миниатюр в очередь после коммита транзакции."""
+    if post.image:
+        name = post.image.name
+        transaction.on_commit(lambda: _submit(name, post))
+
+
+def resolve(posts):
+    """Находит все миниатюры постов страницы одним запросом.
+
+    В post.renditions кладётся {формат: [(ширина, миниатюра)]} по
+    возрастанию ширины, в post.thumbnail — основная JPEG-миниатюра,
+    поэтому цикл ленты в шаблоне уже не обращается к хранилищу.
+    Посты, у которых не хватает хотя бы одной миниатюры, ставятся
+    в очередь, если их картинка недавно не падала при генерации.
+    """
+    posts = [post for post in posts if "thumbnail" not in post.__dict__]
+    with_image = [post for post in posts if post.image]
+    variants = renditions()
+    with timed("thumb"):
+        found = backend.lookup_many(
+            {
+                (post.image.name, name, image_format): (
+                    post.image,
+                    geometry,
+                    options,
+                )
+                for post in with_image
+                for name, image_format, geometry, options in variants
+            }
+        )
+    incomplete = []
+    for post in posts:
+        post.thumbnail = None
+        post.renditions = {}
+        if not post.image:
+            continue
+        for name, image_format, geometry, _ in variants:
+            thumbnail = found.get((post.image.name, name, image_format))
+            if thumbnail is None:
+                continue
+            width = int(geometry.split("x")[0])
+            post.renditions.setdefault(image_format, []).append(
+                (width, thumbnail)
+            )
+            if name == DEFAULT_RENDITION and image_format == "JPEG":
+                post.thumbnail = thumbnail
+        ready = sum(len(sizes) for sizes in post.renditions.values())
+        if ready < len(variants):
+            incomplete.append(post)
+    if incomplete:
+        failed = cache.get_many(
+            [_failed_key(post.image.name) for post in incomplete]
+        )
+        for post in incomplete:
+            if _failed_key(post.image.name) not in failed:
+                schedule(post)
+
+
+def lookup(post):
+    """Возвращает готовую миниатюру или None, если её ещё нет."""
+    resolve([post])
+    return post.thumbnail
+
+
+def lru_stats():
+    """Статистика LRU миниатюр в этом процессе."""
+    return _lru.stats()
@@ -0,0 +1,289 @@
+"""Потоковый перенос данных постов в формате JSONL.
+
+Каждая строка — одна запись с полем "model". Экспорт идёт в порядке
+зависимостей (группы, посты, комментарии, подписки), поэтому импорт
+читает файл за один проход. Пользователи и группы сопоставляются по
+username и slug, посты — по исходному id из файла.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.utils.dateparse import parse_datetime
+
+from . import follows, generations, lookups, search
+from .counters import reconcile_counters
+from .feed import rebuild_feeds
+from .models import Comment, Follow, Group, Post, make_excerpt
+
+User = get_user_model()
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+MODELS = ("group", "post", "comment", "follow")
+
+
+def export_records(chunk_size=CHUNK_SIZE):
+    """Генератор записей для JSONL; память не зависит от объёма базы."""
+    groups = Group.objects.order_by("pk").values(
+        "slug", "title", "description"
+    )
+    for row in groups.iterator(chunk_size=chunk_size):
+        yield {"model": "group", **row}
+    posts = Post.objects.order_by("pk").values_list(
+        "pk", "author__username", "group__slug", "text", "pub_date", "image"
+    )
+    for pk, author, group, text, pub_date, image in posts.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            "model": "post",
+            "id": pk,
+            "author": author,
+            "group": group,
+            "text": text,
+            "pub_date": pub_date.isoformat(),
+            "image": image,
+        }
+    comments = Comment.objects.order_by("pk").values_list(
+        "post_id", "author__username", "text", "created"
+    )
+    for post, author, text, created in comments.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            "model": "comment",
+            "post": post,
+            "author": author,
+            "text": text,
+            "created": created.isoformat(),
+        }
+    follows = Follow.objects.order_by("pk").values_list(
+        "user__username", "author__username"
+    )
+    for user, author in follows.iterator(chunk_size=chunk_size):
+        yield {"model": "follow", "user": user, "author": author}
+
+
+def export_jsonl(stream, chunk_size=CHUNK_SIZE, progress=None):
+    """Пишет все записи в поток. Возвращает {модель: число записей}."""
+    totals = dict.fromkeys(MODELS, 0)
+    for record in export_records(chunk_size):
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        model = record["model"]
+        totals[model] += 1
+        if progress is not None and totals[model] % chunk_size == 0:
+            progress(model, totals[model])
+    return totals
+
+
+def _assign_pks(model, objects):
+    """Проставляет объектам id, которые база выдала при bulk_create.
+
+    PostgreSQL возвращает их сам. Остальные базы выдают id подряд, а
+    импорт идёт в транзакции под блокировкой записи, поэтому новые
+    строки — последние len(objects) по id.
+    """
+    if not objects or objects[0].pk is not None:
+        return
+    pks = model.objects.order_by("-pk").values_list("pk", flat=True)
+    for obj, pk in zip(objects, reversed(pks[: len(objects)])):
+        obj.pk = pk
+
+
+class Importer:
+    """Загружает JSONL пачками bulk_create.
+
+    id постам выдаёт база; соответствие исходных id новым копится
+    в post_ids для комментариев.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.totals = dict.fromkeys(MODELS, 0)
+        self.skipped = 0
+        self.users = {}
+        self.groups = {}
+        self.titles = {}
+        self._remember_groups(Group.objects.all())
+        self.post_ids = {}
+        self.touched_authors = set()
+        self.touched_groups = set()
+        self.touched_posts = set()
+        self.followers = set()
+        self._model = None
+        self._batch = []
+
+    def load(self, lines):
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("model") not in MODELS:
+                self.skipped += 1
+                continue
+            if record["model"] != self._model:
+                self.flush()
+                self._model = record["model"]
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        self.flush()
+        self.finish()
+        return self.totals
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        getattr(self, f"_load_{self._model}")(batch)
+        if self.progress is not None:
+            self.progress(self._model, self.totals[self._model])
+
+    def create_dated(self, model, objects, date_field):
+        """bulk_create с датами из файла.
+
+        auto_now_add при вставке ставит текущее время, поэтому даты
+        возвращаются отдельным bulk_update по выданным id.
+        """
+        dates = [getattr(obj, date_field) for obj in objects]
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        _assign_pks(model, objects)
+        for obj, moment in zip(objects, dates):
+            setattr(obj, date_field, moment)
+        model.objects.bulk_update(
+            objects, [date_field], batch_size=self.batch_size
+        )
+
+    def resolve_users(self, usernames):
+        """id пользователей по username; отсутствующие создаются."""
+        missing = set(usernames) - set(self.users) - {None}
+        if missing:
+            self.users.update(
+                User.objects.filter(username__in=missing).values_list(
+                    "username", "pk"
+                )
+            )
+            new = missing - set(self.users)
+            if new:
+                users = [User(username=username) for username in new]
+                for user in users:
+                    user.set_unusable_password()
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+                # bulk_create не шлёт сигналы: сбрасываем кэш «нет такого».
+                lookups.forget_users(new)
+                self.users.update(
+                    User.objects.filter(username__in=new).values_list(
+                        "username", "pk"
+                    )
+                )
+        return self.users
+
+    def _load_group(self, batch):
+        groups = [
+            Group(
+                slug=record["slug"],
+                title=record["title"],
+                description=record.get("description", ""),
+            )
+            for record in batch
+            if record["slug"] not in self.groups
+        ]
+        Group.objects.bulk_create(groups, batch_size=self.batch_size)
+        lookups.forget_groups([group.slug for group in groups])
+        self._remember_groups(
+            Group.objects.filter(slug__in=[group.slug for group in groups])
+        )
+        self.totals["group"] += len(groups)
+
+    def _remember_groups(self, queryset):
+        for pk, slug, title in queryset.values_list("pk", "slug", "title"):
+            self.groups[slug] = pk
+            self.titles[pk] = title
+
+    def _load_post(self, batch):
+        users = self.resolve_users(record["author"] for record in batch)
+        posts = []
+        for record in batch:
+            group_id = self.groups.get(record.get("group"))
+            post = Post(
+                author_id=users[record["author"]],
+                group_id=group_id,
+                text=record["text"],
+                excerpt=make_excerpt(record["text"]),
+                pub_date=parse_datetime(record["pub_date"]),
+                image=record.get("image") or "",
+            )
+            self.touched_authors.add(post.author_id)
+            if group_id is not None:
+                self.touched_groups.add(group_id)
+            posts.append(post)
+        self.create_dated(Post, posts, "pub_date")
+        for record, post in zip(batch, posts):
+            self.post_ids[record["id"]] = post.pk
+        search.index_rows(
+            [
+                (post.pk, post.text, self.titles.get(post.group_id))
+                for post in posts
+            ]
+        )
+        self.totals["post"] += len(posts)
+
+    def _load_comment(self, batch):
+        users = self.resolve_users(record["author"] for record in batch)
+        comments = []
+        for record in batch:
+            post_id = self.post_ids.get(record["post"])
+            if post_id is None:
+                self.skipped += 1
+                continue
+            comments.append(
+                Comment(
+                    post_id=post_id,
+                    author_id=users[record["author"]],
+                    text=record["text"],
+                    created=parse_datetime(record["created"]),
+                )
+            )
+            self.touched_posts.add(post_id)
+        self.create_dated(Comment, comments, "created")
+        self.totals["comment"] += len(comments)
+
+    def _load_follow(self, batch):
+        users = self.resolve_users(
+            name
+            for record in batch
+            for name in (record["user"], record["author"])
+        )
+        follows = [
+            Follow(
+                user_id=users[record["user"]],
+                author_id=users[record["author"]],
+            )
+            for record in batch
+            if record["user"] != record["author"]
+        ]
+        Follow.objects.bulk_create(
+            follows, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        self.followers.update(follow.user_id for follow in follows)
+        self.totals["follow"] += len(follows)
+
+    def finish(self):
+        """Достраивает то, что при обычной записи делают сигналы."""
+        self.followers.update(
+            Follow.objects.filter(
+                author_id__in=self.touched_authors
+            ).values_list("user_id", flat=True)
+        )
+        if self.followers:
+            rebuild_feeds(self.followers)
+            follows.forget(self.followers)
+        reconcile_counters()
+        scopes = {generations.INDEX}
+        scopes.update(map(generations.author_scope, self.touched_authors))
+        scopes.update(map(generations.group_scope, self.touched_groups))
+        scopes.update(map(generations.post_scope, self.touched_posts))
+        scopes.update(map(generations.follow_scope, self.followers))
+        generations.bump(*scopes)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "posts"
 
@@ -8,6 +8,12 @@ urlpatterns = [
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path("profile/<str:username>/", views.profile, name="profile"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
+    path("search/", views.post_search, name="post_search"),
     path("create/", views.post_create, name="post_create"),
     path("posts/<post_id>/edit/", views.post_edit, name="post_edit"),
     path(
@@ -24,4 +30,16 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
+    path("api/posts/", api.index, name="api_index"),
+    path(
+        "api/group/<slug:slug>/posts/",
+        api.group_posts,
+        name="api_group_list",
+    ),
+    path(
+        "api/profile/<str:username>/posts/",
+        api.profile,
+        name="api_profile",
+    ),
+    path("api/follow/", api.follow_index, name="api_follow_index"),
 ]
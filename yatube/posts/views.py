@@ -1,18 +1,36 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .common import paginator_func
+from core.db_router import read_from_replica
+
+from . import feed, follows, lookups, search, thumbnails
+from .common import (
+    CURSOR_PARAM,
+    CommentPaginator,
+    FeedEntryPaginator,
+    paginator_func,
+)
+from .conditional import (
+    conditional_feed,
+    group_scopes,
+    index_scopes,
+    post_scopes,
+    profile_scopes,
+)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Post
 
 POSTS_PER_PAGE = 10
 
 
+@read_from_replica
+@conditional_feed(index_scopes)
 def index(request):
     title = "Последние обновления на сайте"
     caption = "Последние обновления на сайте"
 
-    post_list = Post.objects.select_related("group", "author").all()
+    post_list = Post.objects.select_related("group", "author").defer("text")
     page_obj = paginator_func(request, post_list)
     context = {
         "page_obj": page_obj,
@@ -22,9 +40,11 @@ def index(request):
     return render(request, "posts/index.html", context)
 
 
+@read_from_replica
+@conditional_feed(group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related("author").all()
+    group = lookups.get_group_or_404(slug)
+    post_list = group.posts.select_related("author").defer("text")
     page_obj = paginator_func(request, post_list)
     context = {
         "group": group,
@@ -33,21 +53,26 @@ def group_posts(request, slug):
     return render(request, "posts/group_list.html", context)
 
 
+@read_from_replica
+@conditional_feed(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related("group").all()
+    author = lookups.get_user_or_404(username)
+    post_list = author.posts.select_related("group").defer("text")
     page_obj = paginator_func(request, post_list)
     context = {
         "author": author,
         "page_obj": page_obj,
-        "following": request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=author).exists(),
+        "following": follows.is_following(request.user, author.pk),
     }
     return render(request, "posts/profile.html", context)
 
 
+@read_from_replica
+@conditional_feed(post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"), pk=post_id
+    )
     if request.method == "POST":
         form = CommentForm()
         if form.is_valid():
@@ -58,15 +83,47 @@ def post_detail(request, post_id):
             return redirect("posts:post_detail", post_id=post.id)
     else:
         form = CommentForm()
-    comments = post.comments.select_related("author").all()
     context = {
         "post": post,
         "form": form,
-        "comments": comments,
+        "comments": comment_page(post.pk, None),
+        "following": follows.is_following(request.user, post.author_id),
     }
     return render(request, "posts/post_detail.html", context)
 
 
+def comment_page(post_id, cursor):
+    """Порция ветки комментариев: новые первыми, по ключу (created, id)."""
+    comments = Comment.objects.select_related("author").filter(
+        post_id=post_id
+    )
+    paginator = CommentPaginator(comments, settings.COMMENTS_PER_PAGE)
+    return paginator.get_page(cursor)
+
+
+@read_from_replica
+@conditional_feed(post_scopes)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    context = {
+        "post": post,
+        "comments": comment_page(post.pk, request.GET.get(CURSOR_PARAM)),
+    }
+    return render(request, "posts/includes/comments.html", context)
+
+
+@read_from_replica
+def post_search(request):
+    query = request.GET.get("q", "").strip()
+    paginator = search.SearchPaginator(query, settings.POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
+    context = {
+        "page_obj": page_obj,
+        "query": query,
+    }
+    return render(request, "posts/search.html", context)
+
+
 @login_required
 def post_create(request):
     if request.method == "POST":
@@ -78,6 +135,7 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            thumbnails.schedule(post)
             return redirect("posts:profile", username=post.author)
     else:
         form = PostForm()
@@ -97,6 +155,8 @@ def post_edit(request, post_id):
         if form.is_valid():
             post = form.save(commit=False)
             form.save()
+            if "image" in form.changed_data:
+                thumbnails.schedule(post)
             return redirect("posts:post_detail", post.pk)
     else:
         form = PostForm(instance=post)
@@ -122,27 +182,43 @@ def add_comment(request, post_id):
 
 
 @login_required
+@read_from_replica
 def follow_index(request):
-    post_list = Post.objects.select_related("author").filter(
-        author__following__user=request.user
+    followed = follows.followed_authors(request.user)
+    entries = feed.entries_for(request.user)
+    if not followed:
+        entries = entries.none()
+    page_obj = feed.page_posts(
+        paginator_func(request, entries, FeedEntryPaginator),
+        Post.objects.select_related("author", "group").defer("text"),
     )
-    page_obj = paginator_func(request, post_list)
     context = {
         "page_obj": page_obj,
+        "following_count": len(followed),
     }
     return render(request, "posts/follow.html", context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = lookups.get_user_or_404(username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        # Решает база, а не кэш графа: он мог отстать от неё. Граф
+        # обновляет сигнал Follow, а если строка уже была — сам view.
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author=author
+        )
+        if not created:
+            follows.refresh(request.user.pk)
     return redirect("posts:profile", username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    author = lookups.get_user_or_404(username)
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author=author
+    ).delete()
+    if not deleted:
+        follows.refresh(request.user.pk)
     return redirect("posts:profile", username=username)
@@ -0,0 +1,23 @@
+// Догружает ветку комментариев порциями вместо перехода по ссылке.
+document.addEventListener("click", function (event) {
+  var link = event.target.closest("[data-comments-more]");
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  link.classList.add("disabled");
+  fetch(link.href, { credentials: "same-origin" })
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.insertAdjacentHTML("afterend", html);
+      link.remove();
+    })
+    .catch(function () {
+      link.classList.remove("disabled");
+    });
+});
@@ -65,11 +65,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.StaticFilesMiddleware",
+    "core.middleware.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -78,9 +82,11 @@ ROOT_URLCONF = "yatube.urls"
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
+# Загрузчики не задаются: без DEBUG Django сам оборачивает их в
+# cached.Loader, и скомпилированные шаблоны остаются в памяти процесса.
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.TimedDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -96,6 +102,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "yatube.wsgi.application"
+# Прогревать ли процесс при загрузке WSGI-приложения (core/warmup.py).
+WARMUP_ON_START = not DEBUG
 
 
 # Database
@@ -105,9 +113,35 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+        "CONN_MAX_AGE": 60,
+    },
+    # Локальная реплика для чтения: копия default, которую обновляет
+    # команда sync_replicas. Пока файла нет, чтение идёт из default.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.replica.sqlite3"),
+        "CONN_MAX_AGE": 60,
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+# PRAGMA для каждого нового соединения SQLite (см. core/sqlite.py).
+# WAL не блокирует читателей записью; synchronous=normal в WAL
+# не теряет целостность; cache_size < 0 задаётся в КиБ.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "memory",
+    "busy_timeout": 5000,
 }
 
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+DATABASE_REPLICAS = ["replica"]
+# Сколько секунд после своей записи пользователь читает из default.
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,6 +167,98 @@ AUTH_PASSWORD_VALIDATORS = [
 
 POSTS_PER_PAGE = 10
 
+# "page" — классическая нумерация ?page=N, "cursor" — keyset-пагинация
+# по (pub_date, id) с токенами ?cursor=...
+POSTS_PAGINATION_MODE = "page"
+
+# Комментариев в одной порции ветки под постом.
+COMMENTS_PER_PAGE = 20
+
+# Сколько последних постов автора попадает в ленту при подписке
+# (None — все посты).
+FEED_BACKFILL_LIMIT = 1000
+
+# Сколько хранить в кэше множество подписок пользователя, сек.
+# После подписки и отписки оно перезаписывается сразу.
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+# Кэш поиска группы по slug и пользователя по username, сек.
+# Запись сбрасывается при сохранении и удалении; отсутствие записи
+# кэшируется ненадолго.
+LOOKUP_CACHE_TIMEOUT = 60 * 60 * 24
+LOOKUP_MISSING_TIMEOUT = 60
+
+# Сессии в кэше с отложенной записью в базу (core/sessions.py): в базу
+# сессия пишется не чаще раза в SESSION_WRITE_BEHIND_SECONDS. В бою кэш
+# должен быть общим для воркеров (memcached, redis), а не locmem:
+# это проверяет manage.py check --deploy.
+SESSION_ENGINE = "core.sessions"
+SESSION_WRITE_BEHIND_SECONDS = 60
+# Пользователь запроса из кэша (core/auth.py); сбрасывается при
+# сохранении пользователя, в том числе при смене пароля.
+AUTH_USER_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни карточек постов в кэше, сек. Свежесть обеспечивает
+# метка Post.updated в ключе карточки (posts/cards.py), а не короткий TTL.
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Предельное число SQL-запросов на view (по имени URL), включая поиск
+# миниатюр страницы в KVStore на холодном кэше. Превышение пишется
+# в лог yatube.timing, а при QUERY_BUDGET_STRICT — исключение.
+VIEW_QUERY_BUDGETS = {
+    "posts:index": 5,
+    "posts:group_list": 7,
+    "posts:profile": 8,
+    "posts:post_detail": 6,
+    "posts:post_comments": 5,
+    "posts:follow_index": 6,
+    "posts:post_search": 6,
+    "posts:api_index": 4,
+    "posts:api_group_list": 5,
+    "posts:api_profile": 5,
+    "posts:api_follow_index": 5,
+}
+QUERY_BUDGET_STRICT = False
+
+# Обработка картинок постов при загрузке (posts/images.py): предел
+# большей стороны в пикселях, формат хранения фото и качество сжатия.
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_FORMAT = "JPEG"
+POST_IMAGE_JPEG_QUALITY = 85
+POST_IMAGE_WEBP_QUALITY = 80
+
+# Фоновая генерация миниатюр постов: число потоков и предел очереди.
+POST_THUMBNAIL_WORKERS = 2
+POST_THUMBNAIL_QUEUE_SIZE = 64
+# Через сколько секунд снова пробовать картинку, миниатюры которой
+# не построились (битый или неподдерживаемый файл).
+POST_THUMBNAIL_RETRY_SECONDS = 60 * 60
+# Сколько найденных миниатюр (все размеры и форматы) держать в LRU
+# памяти процесса.
+POST_THUMBNAIL_LRU_SIZE = 16384
+
+# Сжатие ответов (core.middleware.CompressionMiddleware).
+COMPRESS_CONTENT_TYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+}
+COMPRESS_MIN_SIZE = 512
+COMPRESS_LEVELS = {"gzip": 6, "br": 5}
+# Страницы с CSRF-токеном: "skip" — отдавать несжатыми (защита от BREACH),
+# "mask" — gzip со случайной добавкой до COMPRESS_MASK_MAX_LENGTH байт,
+# "compress" — сжимать без защиты.
+COMPRESS_CSRF_PAGES = "skip"
+COMPRESS_MASK_MAX_LENGTH = 100
+
+# Наибольший размер страницы JSON API (параметр limit).
+API_MAX_PAGE_SIZE = 100
+
 MODELS_CONST_SHORT_TITLE = 15
 
 LANGUAGE_CODE = "ru"
@@ -150,6 +276,29 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = "/static/"
+# Сюда collectstatic собирает статику для StaticFilesMiddleware.
+STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
+if not DEBUG:
+    # Хэши в именах файлов и сжатые копии .gz/.br (core/storage.py).
+    STATICFILES_STORAGE = (
+        "core.storage.CompressedManifestStaticFilesStorage"
+    )
+# Что и начиная с какого размера сжимать при collectstatic.
+STATIC_COMPRESS_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".map",
+    ".svg",
+    ".ico",
+    ".txt",
+    ".json",
+    ".xml",
+)
+STATIC_COMPRESS_MIN_SIZE = 256
+# Время жизни в кэше браузера: файлы с хэшем в имени не меняются,
+# остальные браузер перепроверяет.
+STATIC_HASHED_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_UNHASHED_MAX_AGE = 60 * 60
 
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"